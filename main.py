@@ -805,15 +805,17 @@ def analyze_calendar():
 
 @analyze.command('run')
 @click.option('--save', '-s', is_flag=True, help='Save signals as alerts')
+@click.option('--phase', 'phase_gated', is_flag=True, help='Only run detectors relevant to the current market phase')
+@click.option('--top', 'top_k', type=int, default=None, help='Only show the N most severe signals')
 @click.pass_context
-def analyze_run(ctx, save):
+def analyze_run(ctx, save, phase_gated, top_k):
     """Run full investment analysis."""
     from src.analyzer import get_analyzer
     
     analyzer = get_analyzer(platform=ctx.obj['platform'])
     
     with console.status("Running analysis..."):
-        signals = analyzer.run_full_analysis()
+        signals = analyzer.run_full_analysis(phase_gated=phase_gated, top_k=top_k)
     
     if not signals:
         console.print("No investment signals found", style="yellow")
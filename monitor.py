@@ -9,10 +9,14 @@ Usage:
 """
 
 import argparse
-import time
+import asyncio
+import signal
 import logging
+from collections import namedtuple
+from itertools import islice
 from datetime import datetime
 from pathlib import Path
+from typing import List
 
 # Set up logging to file
 log_dir = Path(__file__).parent / "logs"
@@ -28,48 +32,99 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Optional faster event loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-def update_prices(platform: str = 'ps') -> dict:
+# Price update pipeline sizing
+PRICE_FETCH_CONCURRENCY = 4  # Max price scrapes in flight
+PRICE_QUEUE_SIZE = 64   # Max fetched prices waiting to be written
+PRICE_WRITE_BATCH = 32  # Max prices per bulk insert
+
+# Fixed-layout record for a buy opportunity reported by the monitor
+BuyResult = namedtuple('BuyResult', 'name price score signal confidence ready reasons')
+
+# Reason prefix -> buy readiness (V3 adds ✓ READY / ⏳ ALMOST reasons)
+READY_MAP = {'✓': 'READY', '⏳': 'ALMOST'}
+
+
+async def _fetch_prices(manager, players: list, queue: asyncio.Queue) -> None:
+    """
+    Producer: scrape players' prices concurrently and queue them for the writer.
+    
+    Up to PRICE_FETCH_CONCURRENCY requests are in flight; the scraper's
+    shared rate limiter still spaces their starts by SCRAPE_DELAY.
+    """
+    slots = asyncio.Semaphore(PRICE_FETCH_CONCURRENCY)
+    
+    async def fetch_one(player: dict) -> None:
+        async with slots:
+            record = await asyncio.to_thread(manager.scrape_price, player)
+        if record:
+            await queue.put(record)
+            logger.debug(f"  {player['name']}: {record['price']:,}")
+    
+    await asyncio.gather(*(fetch_one(player) for player in players))
+    
+    # Sentinel: tell the writer there is nothing more to come
+    await queue.put(None)
+
+
+async def _write_prices(db, queue: asyncio.Queue) -> int:
+    """Consumer: drain queued prices and insert them in batches."""
+    written = 0
+    done = False
+    
+    while not done:
+        batch = [await queue.get()]
+        while len(batch) < PRICE_WRITE_BATCH and not queue.empty():
+            batch.append(queue.get_nowait())
+        
+        # The sentinel is always the last item queued
+        if batch[-1] is None:
+            batch.pop()
+            done = True
+        
+        if batch:
+            try:
+                written += await asyncio.to_thread(db.add_prices_bulk, batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} prices: {e}")
+    
+    return written
+
+
+async def update_prices(platform: str = 'ps') -> dict:
     """Update all player prices and return summary stats."""
     from src.player_manager import get_manager
-    from src.database import get_db
     
     manager = get_manager(platform=platform)
-    db = get_db()
     
-    players = manager.get_active_players()
-    updated = 0
-    failed = 0
+    players = await asyncio.to_thread(manager.get_active_players)
     
-    for player in players:
-        try:
-            price = manager.fetch_price(player['id'])
-            if price:
-                updated += 1
-                logger.debug(f"  {player['name']}: {price:,}")
-            else:
-                failed += 1
-        except Exception as e:
-            logger.error(f"Failed to update {player['name']}: {e}")
-            failed += 1
-        
-        # Small delay between requests to be nice to Futbin
-        time.sleep(1)
+    # Fetch and write concurrently: network waits overlap with DB inserts
+    queue = asyncio.Queue(maxsize=PRICE_QUEUE_SIZE)
+    _, updated = await asyncio.gather(
+        _fetch_prices(manager, players, queue),
+        _write_prices(manager.db, queue),
+    )
     
     return {
         'total': len(players),
         'updated': updated,
-        'failed': failed,
+        'failed': len(players) - updated,
         'timestamp': datetime.now()
     }
 
 
-def check_alerts(platform: str = 'ps') -> list:
+async def check_alerts(platform: str = 'ps') -> list:
     """Check for any triggered alerts."""
     try:
         from src.alert_manager import get_alert_manager
         alert_mgr = get_alert_manager(platform=platform)
-        triggered = alert_mgr.check_alerts()
+        triggered = await asyncio.to_thread(alert_mgr.check_alerts)
         return triggered
     except ImportError:
         # Alert manager not implemented yet
@@ -79,12 +134,13 @@ def check_alerts(platform: str = 'ps') -> list:
         return []
 
 
-def analyze_market(platform: str = 'ps') -> dict:
+async def analyze_market(platform: str = 'ps') -> dict:
     """Run market pulse analysis."""
-    from src.market_pulse import MarketPulseAnalyzer
+    from src.market_pulse import get_pulse_analyzer
     
-    analyzer = MarketPulseAnalyzer(platform=platform)
-    pulse = analyzer.get_pulse(fetch_fresh=False)  # Use cache to be fast
+    # Shared per-platform analyzer, so its pulse cache carries across cycles
+    analyzer = get_pulse_analyzer(platform=platform)
+    pulse = await asyncio.to_thread(analyzer.get_pulse, fetch_fresh=False)  # Use cache to be fast
     
     if not pulse:
         return None
@@ -98,39 +154,77 @@ def analyze_market(platform: str = 'ps') -> dict:
     }
 
 
-def find_buy_opportunities(platform: str = 'ps', top_n: int = 5) -> list:
+async def find_buy_opportunities(platform: str = 'ps', top_n: int = 5) -> List[BuyResult]:
     """Find the best buy opportunities based on V3 smart signals."""
     from src.smart_signals import SmartSignals
     
     signals = SmartSignals(platform=platform)
-    opportunities = signals.scan_buy_opportunities(min_score=55)
+    opportunities = await asyncio.to_thread(signals.scan_buy_opportunities, min_score=55)
     
     results = []
     for opp in opportunities[:top_n]:
-        # Extract buy readiness from reasons (V3 adds ✓ READY reasons)
-        ready_status = "WAIT"
-        for reason in (opp.reasons or []):
-            if reason.startswith("✓"):
-                ready_status = "READY"
-                break
-            elif reason.startswith("⏳"):
-                ready_status = "ALMOST"
-                break
+        # Buy readiness comes from the first reason with a known prefix
+        reasons = opp.reasons or ()
+        ready_status = next(
+            (READY_MAP[r[:1]] for r in reasons if r[:1] in READY_MAP), 'WAIT'
+        )
         
-        results.append({
-            'name': opp.player_name,
-            'price': opp.current_price,
-            'score': opp.score,
-            'signal': opp.signal_type,
-            'confidence': getattr(opp, 'confidence', 'MEDIUM'),
-            'ready': ready_status,
-            'reasons': opp.reasons[:2] if opp.reasons else []
-        })
+        results.append(BuyResult(
+            opp.player_name,
+            opp.current_price,
+            opp.score,
+            opp.signal_type,
+            getattr(opp, 'confidence', 'MEDIUM'),
+            ready_status,
+            tuple(islice(reasons, 2))
+        ))
     
     return results
 
 
-def run_cycle(platform: str = 'ps', analyze: bool = True):
+async def _report_alerts(platform: str):
+    """Check alerts and log anything that triggered."""
+    logger.info("Checking alerts...")
+    triggered = await check_alerts(platform)
+    if triggered:
+        logger.warning(f"🚨 {len(triggered)} ALERTS TRIGGERED!")
+        for alert in triggered:
+            logger.warning(f"  → {alert['player_name']}: {alert['type']} at {alert['current_price']:,}")
+    else:
+        logger.info("No alerts triggered")
+
+
+async def _report_analysis(platform: str):
+    """Run market analysis and the buy scan, logging the results."""
+    logger.info("Analyzing market...")
+    try:
+        market = await analyze_market(platform)
+        logger.info(f"Market Status: {market['overall_status']}")
+        logger.info(f"  Avg Position: {market['avg_position']:.1f}%")
+        logger.info(f"  At Lows: {market['pct_at_lows']:.0f}% | At Highs: {market['pct_at_highs']:.0f}%")
+        logger.info(f"  Recommendation: {market['recommendation']}")
+    except Exception as e:
+        logger.error(f"Market analysis failed: {e}")
+    
+    # Find buy opportunities (V3 with buy readiness)
+    logger.info("Scanning for buy opportunities...")
+    try:
+        buys = await find_buy_opportunities(platform)
+        if buys:
+            logger.info(f"🎯 TOP {len(buys)} BUY OPPORTUNITIES:")
+            for b in buys:
+                ready_icon = "✓" if b.ready == "READY" else "⏳" if b.ready == "ALMOST" else "⏸"
+                reason_str = ' | '.join(b.reasons) if b.reasons else ''
+                logger.info(f"  {ready_icon} {b.name}: {b.price:,} coins | Score: {b.score}/100 | {b.signal} | {b.confidence} conf")
+                if reason_str:
+                    logger.info(f"      {reason_str}")
+        else:
+            logger.info("No strong buy opportunities found (score >= 55)")
+    except Exception as e:
+        logger.error(f"Buy scan failed: {e}")
+
+
+async def run_cycle(platform: str = 'ps', analyze: bool = True):
     """Run one complete monitoring cycle."""
     logger.info("=" * 60)
     logger.info(f"Starting monitoring cycle at {datetime.now()}")
@@ -138,47 +232,14 @@ def run_cycle(platform: str = 'ps', analyze: bool = True):
     
     # 1. Update prices
     logger.info("Updating prices...")
-    stats = update_prices(platform)
+    stats = await update_prices(platform)
     logger.info(f"Prices updated: {stats['updated']}/{stats['total']} success, {stats['failed']} failed")
     
-    # 2. Check alerts
-    logger.info("Checking alerts...")
-    triggered = check_alerts(platform)
-    if triggered:
-        logger.warning(f"🚨 {len(triggered)} ALERTS TRIGGERED!")
-        for alert in triggered:
-            logger.warning(f"  → {alert['player_name']}: {alert['type']} at {alert['current_price']:,}")
-    else:
-        logger.info("No alerts triggered")
-    
-    # 3. Market analysis (optional, slower)
+    # 2. Check alerts, overlapped with 3. market analysis (optional, slower)
+    tasks = [_report_alerts(platform)]
     if analyze:
-        logger.info("Analyzing market...")
-        try:
-            market = analyze_market(platform)
-            logger.info(f"Market Status: {market['overall_status']}")
-            logger.info(f"  Avg Position: {market['avg_position']:.1f}%")
-            logger.info(f"  At Lows: {market['pct_at_lows']:.0f}% | At Highs: {market['pct_at_highs']:.0f}%")
-            logger.info(f"  Recommendation: {market['recommendation']}")
-        except Exception as e:
-            logger.error(f"Market analysis failed: {e}")
-        
-        # 4. Find buy opportunities (V3 with buy readiness)
-        logger.info("Scanning for buy opportunities...")
-        try:
-            buys = find_buy_opportunities(platform)
-            if buys:
-                logger.info(f"🎯 TOP {len(buys)} BUY OPPORTUNITIES:")
-                for b in buys:
-                    ready_icon = "✓" if b['ready'] == "READY" else "⏳" if b['ready'] == "ALMOST" else "⏸"
-                    reason_str = ' | '.join(b['reasons']) if b['reasons'] else ''
-                    logger.info(f"  {ready_icon} {b['name']}: {b['price']:,} coins | Score: {b['score']}/100 | {b['signal']} | {b['confidence']} conf")
-                    if reason_str:
-                        logger.info(f"      {reason_str}")
-            else:
-                logger.info("No strong buy opportunities found (score >= 55)")
-        except Exception as e:
-            logger.error(f"Buy scan failed: {e}")
+        tasks.append(_report_analysis(platform))
+    await asyncio.gather(*tasks)
     
     logger.info(f"Cycle complete at {datetime.now()}")
     logger.info("")
@@ -186,20 +247,48 @@ def run_cycle(platform: str = 'ps', analyze: bool = True):
     return stats
 
 
+async def _daemon_loop(platform: str, interval_minutes: int, analyze: bool):
+    """Run cycles until SIGTERM, sleeping interval_minutes in between."""
+    stop = asyncio.Event()
+    
+    def request_stop():
+        logger.info("Received SIGTERM, shutting down...")
+        stop.set()
+    
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, request_stop)
+    
+    while not stop.is_set():
+        await run_cycle(platform, analyze=analyze)
+        
+        logger.info(f"Sleeping for {interval_minutes} minutes...")
+        try:
+            # Returns early as soon as SIGTERM sets the stop event
+            await asyncio.wait_for(stop.wait(), timeout=interval_minutes * 60)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _run(coro):
+    """Run a coroutine on uvloop when available, else the default loop."""
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(coro)
+
+
 def daemon_mode(platform: str, interval_minutes: int, analyze: bool):
     """Run continuously in background."""
     logger.info(f"Starting daemon mode - updating every {interval_minutes} minutes")
     logger.info("Press Ctrl+C to stop")
     
     try:
-        while True:
-            run_cycle(platform, analyze=analyze)
-            
-            logger.info(f"Sleeping for {interval_minutes} minutes...")
-            time.sleep(interval_minutes * 60)
+        _run(_daemon_loop(platform, interval_minutes, analyze))
+        logger.info("Monitor stopped")
             
     except KeyboardInterrupt:
         logger.info("Monitor stopped by user")
+    finally:
+        # Flush file handlers before the process exits
+        logging.shutdown()
 
 
 def main():
@@ -218,7 +307,7 @@ def main():
     if args.daemon:
         daemon_mode(args.platform, args.interval, not args.no_analyze)
     else:
-        run_cycle(args.platform, not args.no_analyze)
+        _run(run_cycle(args.platform, not args.no_analyze))
 
 
 if __name__ == "__main__":
@@ -4,15 +4,23 @@ HazardPay Scheduler
 Runs price updates every 15 minutes in the background.
 """
 
+import signal
 import subprocess
 import sys
-import time
+import threading
 from datetime import datetime
 from pathlib import Path
 
 # Configuration
 UPDATE_INTERVAL_MINUTES = 15
 PROJECT_DIR = Path(__file__).parent.absolute()
+LOG_DIR = PROJECT_DIR / "logs"
+UPDATE_LOG = LOG_DIR / "update.log"
+UPDATE_LOG_MAX_BYTES = 5 * 1024 * 1024  # Roll over to update.log.1 past 5 MB
+SUCCESS_MARK = '✓'.encode()
+
+# Set by SIGTERM so the sleep between updates wakes up immediately
+_stop = threading.Event()
 
 
 def log(message: str):
@@ -21,25 +29,57 @@ def log(message: str):
     print(f"[{timestamp}] {message}")
 
 
+def _rotate_update_log():
+    """Roll the update log over once it grows past the size limit."""
+    if UPDATE_LOG.exists() and UPDATE_LOG.stat().st_size > UPDATE_LOG_MAX_BYTES:
+        UPDATE_LOG.replace(UPDATE_LOG.with_suffix('.log.1'))
+
+
+def _count_success_lines(offset: int) -> int:
+    """Count '✓' lines the update job wrote to the log after offset."""
+    count = 0
+    with open(UPDATE_LOG, 'rb') as fh:
+        fh.seek(offset)
+        for line in fh:
+            if SUCCESS_MARK in line:
+                count += 1
+    return count
+
+
+def _read_log_tail(size: int = 200) -> str:
+    """Return the last few bytes of the update log for error messages."""
+    with open(UPDATE_LOG, 'rb') as fh:
+        fh.seek(0, 2)
+        fh.seek(max(0, fh.tell() - size))
+        return fh.read().decode(errors='replace')
+
+
 def run_update():
     """Run the price update command."""
     try:
         log("Starting price update...")
         
-        result = subprocess.run(
-            [sys.executable, "main.py", "player", "update"],
-            cwd=PROJECT_DIR,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
-        )
+        LOG_DIR.mkdir(exist_ok=True)
+        _rotate_update_log()
+        
+        # Stream the job's output straight into the log file instead of
+        # buffering it all in memory until the process exits
+        with open(UPDATE_LOG, 'ab') as log_fh:
+            offset = log_fh.tell()
+            result = subprocess.run(
+                [sys.executable, "main.py", "player", "update"],
+                cwd=PROJECT_DIR,
+                stdout=log_fh,
+                stderr=subprocess.STDOUT,
+                timeout=300  # 5 minute timeout
+            )
         
         if result.returncode == 0:
-            # Count successful updates from output
-            success_lines = [l for l in result.stdout.split('\n') if '✓' in l]
-            log(f"✓ Update complete ({len(success_lines)} players)")
+            # Count successful updates from this run's section of the log
+            success_count = _count_success_lines(offset)
+            log(f"✓ Update complete ({success_count} players)")
         else:
-            log(f"✗ Update failed: {result.stderr[:200]}")
+            log(f"✗ Update failed: {_read_log_tail()}")
             
     except subprocess.TimeoutExpired:
         log("✗ Update timed out after 5 minutes")
@@ -47,8 +87,15 @@ def run_update():
         log(f"✗ Error: {e}")
 
 
+def _request_stop(signum, frame):
+    """Signal handler: ask the scheduler loop to exit."""
+    _stop.set()
+
+
 def main():
     """Main scheduler loop."""
+    signal.signal(signal.SIGTERM, _request_stop)
+    
     print("""
 ╔═══════════════════════════════════════════════════════════╗
 ║              HAZARDPAY SCHEDULER                          ║
@@ -63,21 +110,27 @@ def main():
     run_update()
     
     try:
-        while True:
+        while not _stop.is_set():
             # Calculate next run time
             next_run = datetime.now().timestamp() + (UPDATE_INTERVAL_MINUTES * 60)
             next_run_str = datetime.fromtimestamp(next_run).strftime("%H:%M:%S")
             log(f"Next update at {next_run_str}")
             
-            # Sleep until next run
-            time.sleep(UPDATE_INTERVAL_MINUTES * 60)
+            # Sleep until next run (returns early on SIGTERM)
+            if _stop.wait(UPDATE_INTERVAL_MINUTES * 60):
+                break
             
             # Run update
             run_update()
+        
+        log("Scheduler stopped")
             
     except KeyboardInterrupt:
         log("\nScheduler stopped by user")
-        sys.exit(0)
+    finally:
+        sys.stdout.flush()
+    
+    sys.exit(0)
 
 
 if __name__ == "__main__":
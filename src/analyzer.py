@@ -3,17 +3,71 @@ Investment Analyzer Module for HazardPay.
 Identifies investment opportunities based on price trends and patterns.
 """
 
+import heapq
 import logging
-from typing import List, Dict, Optional, Tuple
+from itertools import chain
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 
-from .database import get_db, Database
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; fall back to NumPy
+    njit = None
+
+from .database import get_db, Database, PLAYER_SUMMARY_FIELDS
 
 logger = logging.getLogger(__name__)
 
 
+def _momentum_kernel_numpy(prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count up/down steps and % change per row (columns are most recent first)."""
+    steps = np.diff(prices, axis=1)
+    increases = np.count_nonzero(steps < 0, axis=1)
+    decreases = np.count_nonzero(steps > 0, axis=1)
+    
+    start_prices = prices[:, -1]
+    pct_changes = np.divide(
+        (prices[:, 0] - start_prices) * 100, start_prices,
+        out=np.zeros_like(start_prices), where=start_prices != 0
+    )
+    return increases, decreases, pct_changes
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _momentum_kernel(prices):
+        """Single-pass JIT version of _momentum_kernel_numpy."""
+        n, d = prices.shape
+        increases = np.empty(n, np.int32)
+        decreases = np.empty(n, np.int32)
+        pct_changes = np.empty(n, np.float64)
+        
+        for i in prange(n):
+            up = 0
+            down = 0
+            for j in range(d - 1):
+                diff = prices[i, j] - prices[i, j + 1]
+                if diff > 0:
+                    up += 1
+                elif diff < 0:
+                    down += 1
+            increases[i] = up
+            decreases[i] = down
+            
+            start = prices[i, d - 1]
+            pct_changes[i] = (prices[i, 0] - start) / start * 100 if start != 0 else 0.0
+        
+        return increases, decreases, pct_changes
+else:
+    _momentum_kernel = _momentum_kernel_numpy
+
+
 class SignalType(Enum):
     """Types of investment signals."""
     PRICE_DROP = "price_drop"           # Significant price decrease
@@ -28,7 +82,12 @@ class SignalType(Enum):
     CONTENT_DROP = "content_drop"       # Near 6pm UK content time
 
 
-@dataclass
+# Severity levels sort high first
+SEVERITY_HIGH, SEVERITY_MEDIUM, SEVERITY_LOW = 0, 1, 2
+SEVERITY_NAMES = ('high', 'medium', 'low')
+
+
+@dataclass(slots=True)
 class InvestmentSignal:
     """Container for an investment signal."""
     player_id: int
@@ -37,9 +96,249 @@ class InvestmentSignal:
     signal_type: SignalType
     current_price: int
     message: str
-    severity: str  # 'low', 'medium', 'high'
+    severity_level: int  # SEVERITY_HIGH, SEVERITY_MEDIUM or SEVERITY_LOW
     data: Dict  # Additional signal-specific data
     created_at: datetime
+    
+    @property
+    def severity(self) -> str:
+        """Severity name: 'high', 'medium' or 'low'."""
+        return SEVERITY_NAMES[self.severity_level]
+
+# Severity bands for np.searchsorted: thresholds ascending, band index -> severity
+# code (0=high, 1=medium, 2=low)
+_DROP_THRESHOLDS = np.array([15.0, 20.0])
+_SPIKE_THRESHOLDS = np.array([15.0, 25.0])
+_VOLATILITY_THRESHOLDS = np.array([25.0])
+_FLOOR_THRESHOLDS = np.array([2.0])
+_LOW_MEDIUM_HIGH = np.array([2, 1, 0], dtype=np.int8)
+_MEDIUM_HIGH = np.array([1, 0], dtype=np.int8)
+_HIGH_MEDIUM = np.array([0, 1], dtype=np.int8)
+_SIGNAL_TYPES = tuple(SignalType)
+_SIGNAL_TYPE_VALUES = tuple(signal_type.value for signal_type in _SIGNAL_TYPES)
+_SIGNAL_TYPE_CODES = {signal_type: code for code, signal_type in enumerate(_SIGNAL_TYPES)}
+
+
+# Message templates, bound once at import
+_DROP_MSG = "Price dropped {:.1f}% in 24h ({:,} → {:,})".format
+_SPIKE_MSG = "Price spiked {:.1f}% in 24h ({:,} → {:,})".format
+_VOLATILITY_MSG = "High volatility: {:.1f}% variance over {} days (avg: {:,})".format
+_MOMENTUM_UP_MSG = "Trending up {} days: +{:.1f}% ({:,} → {:,})".format
+_MOMENTUM_DOWN_MSG = "Trending down {} days: {:.1f}% ({:,} → {:,})".format
+_FLOOR_MSG = "Near price floor! {:.1f}% above minimum ({:,})".format
+_BUY_TARGET_MSG = "HIT BUY TARGET! Current: {:,} <= Target: {:,}".format
+_SELL_TARGET_MSG = "HIT SELL TARGET! Current: {:,} >= Target: {:,}".format
+
+
+def _format_price_drop(row: Dict, pct: float) -> Tuple[str, Dict]:
+    message = _DROP_MSG(pct, row['previous_price'], row['current_price'])
+    return message, {
+        'previous_price': row['previous_price'],
+        'price_change': row['price_change'],
+        'pct_change': pct
+    }
+
+
+def _format_price_spike(row: Dict, pct: float) -> Tuple[str, Dict]:
+    message = _SPIKE_MSG(pct, row['previous_price'], row['current_price'])
+    return message, {
+        'previous_price': row['previous_price'],
+        'price_change': row['price_change'],
+        'pct_change': pct
+    }
+
+
+def _format_high_volatility(row: Dict, pct: float) -> Tuple[str, Dict]:
+    message = _VOLATILITY_MSG(pct, row['days'], int(row['avg_price']))
+    return message, {
+        'volatility_pct': pct,
+        'avg_price': row['avg_price'],
+        'std_dev': row['std_dev'],
+        'data_points': row['data_points']
+    }
+
+
+_BATCH_FORMATTERS = {
+    SignalType.PRICE_DROP: _format_price_drop,
+    SignalType.PRICE_SPIKE: _format_price_spike,
+    SignalType.HIGH_VOLATILITY: _format_high_volatility,
+}
+
+
+class SignalBatch:
+    """
+    Column-oriented batch of per-player signals.
+    
+    Detectors fill NumPy columns instead of building an InvestmentSignal per
+    row; signals (and their messages) are only materialized when iterated.
+    Each row keeps the source dict it was built from for message formatting.
+    """
+    
+    __slots__ = ('signal_types', 'rows', 'current_prices', 'pcts', 'severities', 'created_at')
+    
+    def __init__(
+        self,
+        signal_types: np.ndarray,
+        rows: np.ndarray,
+        current_prices: np.ndarray,
+        pcts: np.ndarray,
+        severities: np.ndarray,
+        created_at: np.ndarray
+    ):
+        self.signal_types = signal_types
+        self.rows = rows
+        self.current_prices = current_prices
+        self.pcts = pcts
+        self.severities = severities
+        self.created_at = created_at
+    
+    @classmethod
+    def from_rows(
+        cls,
+        signal_type: SignalType,
+        rows: List[Dict],
+        current_prices: List[int],
+        pcts: List[float],
+        severities: List[int],
+        created_at: datetime = None
+    ) -> 'SignalBatch':
+        """Build a batch of one signal type from parallel per-row lists."""
+        n = len(rows)
+        row_array = np.empty(n, dtype=object)
+        row_array[:] = rows
+        return cls(
+            signal_types=np.full(n, _SIGNAL_TYPE_CODES[signal_type], dtype=np.int8),
+            rows=row_array,
+            current_prices=np.array(current_prices, dtype=np.int64),
+            pcts=np.array(pcts, dtype=np.float64),
+            severities=np.array(severities, dtype=np.int8),
+            created_at=np.full(n, created_at or datetime.now(), dtype=object)
+        )
+    
+    @classmethod
+    def empty(cls) -> 'SignalBatch':
+        return cls.from_rows(SignalType.PRICE_DROP, [], [], [], [])
+    
+    @classmethod
+    def concatenate(cls, batches: List['SignalBatch']) -> 'SignalBatch':
+        """Join several batches into one."""
+        if not batches:
+            return cls.empty()
+        return cls(*(
+            np.concatenate([getattr(b, column) for b in batches])
+            for column in cls.__slots__
+        ))
+    
+    def take(self, indices: np.ndarray) -> 'SignalBatch':
+        """Select rows by index."""
+        return SignalBatch(*(getattr(self, column)[indices] for column in self.__slots__))
+    
+    def sorted_by_severity(self) -> 'SignalBatch':
+        """Rows ordered high → low severity, keeping production order within a level."""
+        return self.take(np.argsort(self.severities, kind='stable'))
+    
+    def signal(self, i: int) -> InvestmentSignal:
+        """Materialize row i as an InvestmentSignal."""
+        signal_type = _SIGNAL_TYPES[self.signal_types[i]]
+        row = self.rows[i]
+        pct = float(self.pcts[i])
+        message, data = _BATCH_FORMATTERS[signal_type](row, pct)
+        
+        return InvestmentSignal(
+            player_id=row['id'],
+            player_name=row['name'],
+            futbin_id=row.get('futbin_id', 0),
+            signal_type=signal_type,
+            current_price=int(self.current_prices[i]),
+            message=message,
+            severity_level=int(self.severities[i]),
+            data=data,
+            created_at=self.created_at[i]
+        )
+    
+    def alert_rows(self) -> List[Tuple[str, str, str, int]]:
+        """Rows for Database.add_alerts_bulk, without building InvestmentSignals."""
+        rows = []
+        for i in range(len(self)):
+            code = self.signal_types[i]
+            row = self.rows[i]
+            message, _ = _BATCH_FORMATTERS[_SIGNAL_TYPES[code]](row, float(self.pcts[i]))
+            rows.append((row['id'], _SIGNAL_TYPE_VALUES[code], message, int(self.current_prices[i])))
+        return rows
+    
+    def __len__(self) -> int:
+        return len(self.severities)
+    
+    def __iter__(self):
+        return (self.signal(i) for i in range(len(self)))
+
+
+# Weekend League cycle templates by weekday: (signal_type, message, severity_level, data).
+# data is read-only and copied onto each signal
+_WL_TEMPLATES = {
+    0: (SignalType.WL_BUY_WINDOW,
+        "🟢 Weekend League BUY WINDOW - Post-WL sell-off, prices typically low",
+        SEVERITY_HIGH,
+        MappingProxyType({'day': 'Monday', 'recommendation': 'Buy meta players now, sell Thu-Fri', 'cycle_phase': 'post_wl_dip'})),
+    1: (SignalType.WL_BUY_WINDOW,
+        "🟢 Weekend League BUY WINDOW - Post-WL sell-off, prices typically low",
+        SEVERITY_HIGH,
+        MappingProxyType({'day': 'Tuesday', 'recommendation': 'Buy meta players now, sell Thu-Fri', 'cycle_phase': 'post_wl_dip'})),
+    2: (SignalType.WL_BUY_WINDOW,
+        "🟡 Wednesday - Last chance to buy before prices rise Thu-Fri",
+        SEVERITY_MEDIUM,
+        MappingProxyType({'day': 'Wednesday', 'recommendation': 'Final buy window before WL demand kicks in', 'cycle_phase': 'transition'})),
+    3: (SignalType.WL_SELL_WINDOW,
+        "🔴 Weekend League SELL WINDOW - Pre-WL demand high, prices peak",
+        SEVERITY_HIGH,
+        MappingProxyType({'day': 'Thursday', 'recommendation': 'Sell meta players now, buy Mon-Tue', 'cycle_phase': 'pre_wl_peak'})),
+    4: (SignalType.WL_SELL_WINDOW,
+        "🔴 Weekend League SELL WINDOW - Pre-WL demand high, prices peak",
+        SEVERITY_HIGH,
+        MappingProxyType({'day': 'Friday', 'recommendation': 'Sell meta players now, buy Mon-Tue', 'cycle_phase': 'pre_wl_peak'})),
+}
+
+# Content drop window data by local hour (5-7pm as a proxy for 6pm UK);
+# read-only, copied onto each signal
+_CONTENT_DROP_DATA = {
+    hour: MappingProxyType({
+        'local_hour': hour,
+        'recommendation': 'Watch for new SBCs, promos, TOTW. Prices may swing.',
+        'typical_content': ('New SBCs', 'Promo cards', 'TOTW release (Wed)', 'Flash SBCs')
+    })
+    for hour in range(17, 20)
+}
+
+_MARKET_PHASES = {
+    0: {'phase': 'buy', 'name': 'Monday Dip', 'action': '🟢 BUY', 'desc': 'Post-WL sell-off'},
+    1: {'phase': 'buy', 'name': 'Tuesday Dip', 'action': '🟢 BUY', 'desc': 'Continued low prices'},
+    2: {'phase': 'transition', 'name': 'Wednesday', 'action': '🟡 HOLD/BUY', 'desc': 'Last buy chance'},
+    3: {'phase': 'sell', 'name': 'Thursday Peak', 'action': '🔴 SELL', 'desc': 'WL prep begins'},
+    4: {'phase': 'sell', 'name': 'Friday Peak', 'action': '🔴 SELL', 'desc': 'WL demand peaks'},
+    5: {'phase': 'hold', 'name': 'Saturday WL', 'action': '⚪ HOLD', 'desc': 'WL active'},
+    6: {'phase': 'hold', 'name': 'Sunday WL', 'action': '⚪ HOLD', 'desc': 'WL ending soon'},
+}
+
+# Per-player detectors worth running in each market phase, used when
+# run_full_analysis(phase_gated=True). Watchlist targets and market-wide
+# signals always run; the weekend 'hold' phase runs no per-player detectors.
+ALL_DETECTORS = frozenset({
+    'find_price_drops', 'find_price_spikes', 'find_high_volatility',
+    'find_momentum_players', 'find_floor_prices',
+})
+PHASE_DETECTORS = {
+    'buy': frozenset({'find_price_drops', 'find_floor_prices', 'find_momentum_players'}),
+    'transition': frozenset({'find_price_drops', 'find_floor_prices', 'find_momentum_players'}),
+    'sell': frozenset({'find_price_spikes', 'find_high_volatility'}),
+    'hold': frozenset(),
+}
+
+# Detectors returning a SignalBatch vs generators of signals (by their _iter_ producer)
+_BATCH_DETECTORS = ('find_price_drops', 'find_price_spikes', 'find_high_volatility')
+_LIST_DETECTORS = {
+    'find_momentum_players': '_iter_momentum_players',
+    'find_floor_prices': '_iter_floor_prices',
+}
 
 
 class InvestmentAnalyzer:
@@ -55,395 +354,386 @@ class InvestmentAnalyzer:
         self.momentum_days = 3  # Days to check for momentum
         self.volatility_threshold = 15.0  # Volatility % to consider "high"
         self.floor_proximity_threshold = 5.0  # % above floor to trigger alert
-    
-    def run_full_analysis(self) -> List[InvestmentSignal]:
-        """Run all analysis checks and return all signals."""
-        signals = []
         
-        # Run each analysis type
-        signals.extend(self.find_price_drops())
-        signals.extend(self.find_price_spikes())
-        signals.extend(self.find_momentum_players())
-        signals.extend(self.find_floor_prices())
-        signals.extend(self.find_high_volatility())
-        signals.extend(self.check_watchlist_targets())
-        
-        # FUT-specific signals
-        signals.extend(self.check_weekend_league_cycle())
-        signals.extend(self.check_content_drop_window())
+        # Price matrix rows from the last momentum scan, for get_signal_price_history
+        self._momentum_prices: Dict[str, np.ndarray] = {}
+    
+    def run_full_analysis(self, phase_gated: bool = False, top_k: Optional[int] = None) -> List[InvestmentSignal]:
+        """
+        Run analysis checks and return all signals, most severe first.
         
-        # Sort by severity (high first)
-        severity_order = {'high': 0, 'medium': 1, 'low': 2}
-        signals.sort(key=lambda s: (severity_order.get(s.severity, 3), s.created_at))
+        Every detector runs by default. With phase_gated=True only the
+        per-player detectors relevant to the current market phase run (see
+        PHASE_DETECTORS). With top_k set, only the top_k most severe signals
+        are returned.
+        """
+        # One timestamp for the whole run
+        now = datetime.now()
         
-        return signals
+        if phase_gated:
+            enabled = PHASE_DETECTORS.get(self.get_market_phase(now)['phase'], ALL_DETECTORS)
+        else:
+            enabled = ALL_DETECTORS
+        
+        # Fetch active players once and share them across detectors
+        players = self.db.get_active_players(PLAYER_SUMMARY_FIELDS) if enabled else []
+        
+        # Per-player detectors that produce column batches
+        batch = SignalBatch.concatenate([
+            getattr(self, name)(players=players, now=now)
+            for name in _BATCH_DETECTORS if name in enabled
+        ])
+        
+        signals = list(chain(
+            *(
+                getattr(self, producer)(players=players, now=now)
+                for name, producer in _LIST_DETECTORS.items() if name in enabled
+            ),
+            self._iter_watchlist_targets(now=now),
+            # FUT-specific signals
+            self.check_weekend_league_cycle(now=now),
+            self.check_content_drop_window(now=now),
+        ))
+        
+        if top_k is not None and top_k < len(batch) + len(signals):
+            return self._top_signals(batch, signals, top_k)
+        
+        # Sort by severity (high first), then merge in the pre-sorted batch
+        signals.sort(key=attrgetter('severity_level', 'created_at'))
+        
+        return list(heapq.merge(batch.sorted_by_severity(), signals, key=attrgetter('severity_level')))
+    
+    @staticmethod
+    def _top_signals(batch: SignalBatch, signals: List[InvestmentSignal], top_k: int) -> List[InvestmentSignal]:
+        """Pick the top_k most severe signals with a partial sort."""
+        if top_k <= 0:
+            return []
+        
+        levels = np.concatenate([
+            batch.severities,
+            np.fromiter((s.severity_level for s in signals), dtype=np.int8, count=len(signals))
+        ])
+        chosen = np.argpartition(levels, top_k - 1)[:top_k]
+        
+        n_batch = len(batch)
+        top = [batch.signal(i) if i < n_batch else signals[i - n_batch] for i in chosen]
+        top.sort(key=attrgetter('severity_level', 'created_at'))
+        return top
     
-    def find_price_drops(self, threshold: float = None) -> List[InvestmentSignal]:
+    def find_price_drops(self, threshold: float = None, players: List[Dict] = None,
+                         now: datetime = None) -> SignalBatch:
         """
         Find players whose price dropped significantly in the last 24 hours.
         These could be buying opportunities.
         """
         threshold = threshold or self.price_drop_threshold
-        signals = []
+        now = now or datetime.now()
         
         try:
-            drops = self.db.get_price_drops(threshold_pct=threshold, platform=self.platform)
+            drops = self.db.get_price_drops(threshold_pct=threshold, platform=self.platform, players=players)
             
-            for drop in drops:
-                pct = abs(float(drop['pct_change']))
-                
-                # Determine severity
-                if pct >= 20:
-                    severity = 'high'
-                elif pct >= 15:
-                    severity = 'medium'
-                else:
-                    severity = 'low'
-                
-                signals.append(InvestmentSignal(
-                    player_id=drop['id'],
-                    player_name=drop['name'],
-                    futbin_id=0,  # Not in view, would need join
-                    signal_type=SignalType.PRICE_DROP,
-                    current_price=drop['current_price'],
-                    message=f"Price dropped {pct:.1f}% in 24h ({drop['previous_price']:,} → {drop['current_price']:,})",
-                    severity=severity,
-                    data={
-                        'previous_price': drop['previous_price'],
-                        'price_change': drop['price_change'],
-                        'pct_change': pct
-                    },
-                    created_at=datetime.now()
-                ))
+            pcts = np.abs(np.array([float(d['pct_change']) for d in drops], dtype=np.float64))
+            prices = [d['current_price'] for d in drops]
+            severities = _LOW_MEDIUM_HIGH[np.searchsorted(_DROP_THRESHOLDS, pcts, side='right')]
+            
+            return SignalBatch.from_rows(SignalType.PRICE_DROP, drops, prices, pcts, severities, created_at=now)
         except Exception as e:
             logger.error(f"Error finding price drops: {e}")
         
-        return signals
+        return SignalBatch.empty()
     
-    def find_price_spikes(self, threshold: float = None) -> List[InvestmentSignal]:
+    def find_price_spikes(self, threshold: float = None, players: List[Dict] = None,
+                          now: datetime = None) -> SignalBatch:
         """
         Find players whose price increased significantly.
         Could indicate selling opportunity or FOMO danger.
         """
         threshold = threshold or self.price_spike_threshold
-        signals = []
+        now = now or datetime.now()
         
         try:
-            spikes = self.db.get_price_spikes(threshold_pct=threshold, platform=self.platform)
+            spikes = self.db.get_price_spikes(threshold_pct=threshold, platform=self.platform, players=players)
             
-            for spike in spikes:
-                pct = float(spike['pct_change'])
-                
-                if pct >= 25:
-                    severity = 'high'
-                elif pct >= 15:
-                    severity = 'medium'
-                else:
-                    severity = 'low'
-                
-                signals.append(InvestmentSignal(
-                    player_id=spike['id'],
-                    player_name=spike['name'],
-                    futbin_id=0,
-                    signal_type=SignalType.PRICE_SPIKE,
-                    current_price=spike['current_price'],
-                    message=f"Price spiked {pct:.1f}% in 24h ({spike['previous_price']:,} → {spike['current_price']:,})",
-                    severity=severity,
-                    data={
-                        'previous_price': spike['previous_price'],
-                        'price_change': spike['price_change'],
-                        'pct_change': pct
-                    },
-                    created_at=datetime.now()
-                ))
+            pcts = np.array([float(sp['pct_change']) for sp in spikes], dtype=np.float64)
+            prices = [sp['current_price'] for sp in spikes]
+            severities = _LOW_MEDIUM_HIGH[np.searchsorted(_SPIKE_THRESHOLDS, pcts, side='right')]
+            
+            return SignalBatch.from_rows(SignalType.PRICE_SPIKE, spikes, prices, pcts, severities, created_at=now)
         except Exception as e:
             logger.error(f"Error finding price spikes: {e}")
         
-        return signals
+        return SignalBatch.empty()
     
-    def find_momentum_players(self, days: int = None) -> List[InvestmentSignal]:
+    def find_momentum_players(self, days: int = None, players: List[Dict] = None,
+                              now: datetime = None) -> List[InvestmentSignal]:
         """
         Find players with consistent price momentum over N days.
         Upward momentum = potential investment, downward = wait to buy.
         """
+        return list(self._iter_momentum_players(days, players, now))
+    
+    def _iter_momentum_players(self, days: int = None, players: List[Dict] = None,
+                               now: datetime = None) -> Iterator[InvestmentSignal]:
         days = days or self.momentum_days
-        signals = []
+        now = now or datetime.now()
         
         try:
-            players = self.db.get_active_players()
+            ids, names, futbin_ids, prices = self.db.get_recent_prices_matrix(
+                days=days, platform=self.platform, players=players
+            )
+            
+            if not ids:
+                return
+            
+            self._momentum_prices = dict(zip(ids, prices))
+            
+            increases, decreases, pct_changes = _momentum_kernel(prices)
+            start_prices = prices[:, -1]
+            end_prices = prices[:, 0]
+            min_prices = prices.min(axis=1)
+            max_prices = prices.max(axis=1)
+            
+            up_mask = (increases >= days - 1) & (pct_changes > 5)
+            down_mask = ~up_mask & (decreases >= days - 1) & (pct_changes < -5)
             
-            for player in players:
-                history = self.db.get_price_history(
-                    player['id'], 
-                    platform=self.platform, 
-                    days=days + 1
+            # Strong upward momentum
+            for i in np.flatnonzero(up_mask):
+                start, end, pct_change = int(start_prices[i]), int(end_prices[i]), float(pct_changes[i])
+                yield InvestmentSignal(
+                    player_id=ids[i],
+                    player_name=names[i],
+                    futbin_id=futbin_ids[i],
+                    signal_type=SignalType.MOMENTUM_UP,
+                    current_price=end,
+                    message=_MOMENTUM_UP_MSG(days, pct_change, start, end),
+                    severity_level=SEVERITY_MEDIUM,
+                    data={
+                        'days': days,
+                        'start_price': start,
+                        'end_price': end,
+                        'min_price': int(min_prices[i]),
+                        'max_price': int(max_prices[i]),
+                        'pct_change': pct_change
+                    },
+                    created_at=now
+                )
+            
+            # Strong downward momentum
+            for i in np.flatnonzero(down_mask):
+                start, end, pct_change = int(start_prices[i]), int(end_prices[i]), float(pct_changes[i])
+                yield InvestmentSignal(
+                    player_id=ids[i],
+                    player_name=names[i],
+                    futbin_id=futbin_ids[i],
+                    signal_type=SignalType.MOMENTUM_DOWN,
+                    current_price=end,
+                    message=_MOMENTUM_DOWN_MSG(days, pct_change, start, end),
+                    severity_level=SEVERITY_LOW,
+                    data={
+                        'days': days,
+                        'start_price': start,
+                        'end_price': end,
+                        'min_price': int(min_prices[i]),
+                        'max_price': int(max_prices[i]),
+                        'pct_change': pct_change
+                    },
+                    created_at=now
                 )
-                
-                if len(history) < days:
-                    continue
-                
-                # Get daily prices (most recent first)
-                daily_prices = [h['price'] for h in history[:days + 1]]
-                
-                if len(daily_prices) < 2:
-                    continue
-                
-                # Check for consistent direction
-                increases = sum(1 for i in range(len(daily_prices) - 1) 
-                              if daily_prices[i] > daily_prices[i + 1])
-                decreases = sum(1 for i in range(len(daily_prices) - 1) 
-                              if daily_prices[i] < daily_prices[i + 1])
-                
-                total_change = daily_prices[0] - daily_prices[-1]
-                pct_change = (total_change / daily_prices[-1]) * 100 if daily_prices[-1] else 0
-                
-                # Strong upward momentum
-                if increases >= days - 1 and pct_change > 5:
-                    signals.append(InvestmentSignal(
-                        player_id=player['id'],
-                        player_name=player['name'],
-                        futbin_id=player['futbin_id'],
-                        signal_type=SignalType.MOMENTUM_UP,
-                        current_price=daily_prices[0],
-                        message=f"Trending up {days} days: +{pct_change:.1f}% ({daily_prices[-1]:,} → {daily_prices[0]:,})",
-                        severity='medium',
-                        data={
-                            'days': days,
-                            'start_price': daily_prices[-1],
-                            'pct_change': pct_change,
-                            'daily_prices': daily_prices
-                        },
-                        created_at=datetime.now()
-                    ))
-                
-                # Strong downward momentum
-                elif decreases >= days - 1 and pct_change < -5:
-                    signals.append(InvestmentSignal(
-                        player_id=player['id'],
-                        player_name=player['name'],
-                        futbin_id=player['futbin_id'],
-                        signal_type=SignalType.MOMENTUM_DOWN,
-                        current_price=daily_prices[0],
-                        message=f"Trending down {days} days: {pct_change:.1f}% ({daily_prices[-1]:,} → {daily_prices[0]:,})",
-                        severity='low',
-                        data={
-                            'days': days,
-                            'start_price': daily_prices[-1],
-                            'pct_change': pct_change,
-                            'daily_prices': daily_prices
-                        },
-                        created_at=datetime.now()
-                    ))
         except Exception as e:
             logger.error(f"Error analyzing momentum: {e}")
+    
+    def get_signal_price_history(self, signal: InvestmentSignal) -> List[int]:
+        """
+        Get the daily prices behind a momentum signal (most recent first).
         
-        return signals
+        Served from the last momentum scan's price matrix when possible,
+        otherwise read from price history.
+        """
+        row = self._momentum_prices.get(signal.player_id)
+        if row is not None:
+            return row.astype(int).tolist()
+        
+        days = signal.data.get('days', self.momentum_days)
+        history = self.db.get_price_history(
+            signal.player_id, platform=self.platform, days=days + 1, limit=days + 1
+        )
+        return [h['price'] for h in history]
     
-    def find_floor_prices(self, threshold_pct: float = None) -> List[InvestmentSignal]:
+    def find_floor_prices(self, threshold_pct: float = None, players: List[Dict] = None,
+                          now: datetime = None) -> List[InvestmentSignal]:
         """
         Find players at or near their price range floor.
         At floor = minimal downside risk.
         """
+        return list(self._iter_floor_prices(threshold_pct, players, now))
+    
+    def _iter_floor_prices(self, threshold_pct: float = None, players: List[Dict] = None,
+                           now: datetime = None) -> Iterator[InvestmentSignal]:
         threshold_pct = threshold_pct or self.floor_proximity_threshold
-        signals = []
+        now = now or datetime.now()
         
         try:
-            players = self.db.get_active_players()
+            rows = [
+                r for r in self.db.get_latest_prices_with_range(platform=self.platform, players=players)
+                if r.get('price_min') and r['price_min'] > 0
+            ]
             
-            for player in players:
-                latest = self.db.get_latest_price(player['id'], platform=self.platform)
-                
-                if not latest or not latest.get('price_min'):
-                    continue
-                
-                price = latest['price']
-                floor = latest['price_min']
-                
-                if floor <= 0:
-                    continue
-                
-                above_floor_pct = ((price - floor) / floor) * 100
+            if not rows:
+                return
+            
+            prices = np.array([r['price'] for r in rows], dtype=np.float64)
+            floors = np.array([r['price_min'] for r in rows], dtype=np.float64)
+            above_floor = (prices - floors) / floors * 100
+            # Within 2% of the floor is high, otherwise medium
+            severities = _HIGH_MEDIUM[np.searchsorted(_FLOOR_THRESHOLDS, above_floor, side='left')]
+            
+            for i in np.flatnonzero(above_floor <= threshold_pct):
+                row = rows[i]
+                floor = row['price_min']
+                above_floor_pct = float(above_floor[i])
                 
-                if above_floor_pct <= threshold_pct:
-                    severity = 'high' if above_floor_pct <= 2 else 'medium'
-                    
-                    signals.append(InvestmentSignal(
-                        player_id=player['id'],
-                        player_name=player['name'],
-                        futbin_id=player['futbin_id'],
-                        signal_type=SignalType.AT_FLOOR,
-                        current_price=price,
-                        message=f"Near price floor! {above_floor_pct:.1f}% above minimum ({floor:,})",
-                        severity=severity,
-                        data={
-                            'price_min': floor,
-                            'price_max': latest.get('price_max'),
-                            'above_floor_pct': above_floor_pct
-                        },
-                        created_at=datetime.now()
-                    ))
+                yield InvestmentSignal(
+                    player_id=row['id'],
+                    player_name=row['name'],
+                    futbin_id=row['futbin_id'],
+                    signal_type=SignalType.AT_FLOOR,
+                    current_price=row['price'],
+                    message=_FLOOR_MSG(above_floor_pct, floor),
+                    severity_level=int(severities[i]),
+                    data={
+                        'price_min': floor,
+                        'price_max': row['price_max'],
+                        'above_floor_pct': above_floor_pct
+                    },
+                    created_at=now
+                )
         except Exception as e:
             logger.error(f"Error finding floor prices: {e}")
-        
-        return signals
     
-    def find_high_volatility(self, days: int = 7, threshold: float = None) -> List[InvestmentSignal]:
+    def find_high_volatility(self, days: int = 7, threshold: float = None,
+                             players: List[Dict] = None, now: datetime = None) -> SignalBatch:
         """
         Find players with high price volatility.
         High volatility = flip opportunities but also risk.
         """
         threshold = threshold or self.volatility_threshold
-        signals = []
+        now = now or datetime.now()
         
         try:
-            volatility_data = self.db.get_volatility_scores(days=days, platform=self.platform)
+            volatility_data = self.db.get_volatility_scores(days=days, platform=self.platform, players=players)
             
-            for v in volatility_data:
-                vol_pct = float(v['volatility_pct']) if v['volatility_pct'] else 0
-                
-                if vol_pct >= threshold:
-                    severity = 'high' if vol_pct >= 25 else 'medium'
-                    
-                    signals.append(InvestmentSignal(
-                        player_id=v['id'],
-                        player_name=v['name'],
-                        futbin_id=v['futbin_id'],
-                        signal_type=SignalType.HIGH_VOLATILITY,
-                        current_price=int(v['avg_price']),
-                        message=f"High volatility: {vol_pct:.1f}% variance over {days} days (avg: {int(v['avg_price']):,})",
-                        severity=severity,
-                        data={
-                            'volatility_pct': vol_pct,
-                            'avg_price': v['avg_price'],
-                            'std_dev': v['std_dev'],
-                            'data_points': v['data_points']
-                        },
-                        created_at=datetime.now()
-                    ))
+            vol_pcts = np.array(
+                [float(v['volatility_pct']) if v['volatility_pct'] else 0 for v in volatility_data],
+                dtype=np.float64
+            )
+            keep = np.flatnonzero(vol_pcts >= threshold)
+            
+            rows = [volatility_data[i] for i in keep]
+            for v in rows:
+                v['days'] = days
+            prices = [int(v['avg_price']) for v in rows]
+            pcts = vol_pcts[keep]
+            severities = _MEDIUM_HIGH[np.searchsorted(_VOLATILITY_THRESHOLDS, pcts, side='right')]
+            
+            return SignalBatch.from_rows(SignalType.HIGH_VOLATILITY, rows, prices, pcts, severities, created_at=now)
         except Exception as e:
             logger.error(f"Error analyzing volatility: {e}")
         
-        return signals
+        return SignalBatch.empty()
     
-    def check_watchlist_targets(self) -> List[InvestmentSignal]:
+    def check_watchlist_targets(self, now: datetime = None) -> List[InvestmentSignal]:
         """
         Check if any watchlist players hit target buy/sell prices.
         """
-        signals = []
+        return list(self._iter_watchlist_targets(now))
+    
+    def _iter_watchlist_targets(self, now: datetime = None) -> Iterator[InvestmentSignal]:
+        now = now or datetime.now()
         
         try:
-            watchlist = self.db.get_watchlist()
-            
-            for item in watchlist:
-                current = item.get('current_price')
-                if not current:
-                    continue
-                
-                target_buy = item.get('target_buy_price')
-                target_sell = item.get('target_sell_price')
+            for hit in self.db.get_watchlist_hits(platform=self.platform):
+                current = hit['current_price']
+                target = hit['target_price']
+                message = (_BUY_TARGET_MSG if hit['hit_type'] == 'buy' else _SELL_TARGET_MSG)(current, target)
                 
-                # Check buy target
-                if target_buy and current <= target_buy:
-                    signals.append(InvestmentSignal(
-                        player_id=item['player_id'],
-                        player_name=item['name'],
-                        futbin_id=item['futbin_id'],
-                        signal_type=SignalType.WATCHLIST_TARGET,
-                        current_price=current,
-                        message=f"HIT BUY TARGET! Current: {current:,} <= Target: {target_buy:,}",
-                        severity='high',
-                        data={
-                            'target_type': 'buy',
-                            'target_price': target_buy,
-                            'notes': item.get('notes')
-                        },
-                        created_at=datetime.now()
-                    ))
-                
-                # Check sell target
-                if target_sell and current >= target_sell:
-                    signals.append(InvestmentSignal(
-                        player_id=item['player_id'],
-                        player_name=item['name'],
-                        futbin_id=item['futbin_id'],
-                        signal_type=SignalType.WATCHLIST_TARGET,
-                        current_price=current,
-                        message=f"HIT SELL TARGET! Current: {current:,} >= Target: {target_sell:,}",
-                        severity='high',
-                        data={
-                            'target_type': 'sell',
-                            'target_price': target_sell,
-                            'notes': item.get('notes')
-                        },
-                        created_at=datetime.now()
-                    ))
+                yield InvestmentSignal(
+                    player_id=hit['player_id'],
+                    player_name=hit['name'],
+                    futbin_id=hit['futbin_id'],
+                    signal_type=SignalType.WATCHLIST_TARGET,
+                    current_price=current,
+                    message=message,
+                    severity_level=SEVERITY_HIGH,
+                    data={
+                        'target_type': hit['hit_type'],
+                        'target_price': target,
+                        'notes': hit['notes']
+                    },
+                    created_at=now
+                )
         except Exception as e:
             logger.error(f"Error checking watchlist: {e}")
-        
-        return signals
     
-    def save_signals_as_alerts(self, signals: List[InvestmentSignal]) -> int:
-        """Save signals to the database as alerts."""
-        count = 0
-        for signal in signals:
-            try:
-                self.db.add_alert(
-                    player_id=signal.player_id,
-                    alert_type=signal.signal_type.value,
-                    message=signal.message,
-                    price_at_alert=signal.current_price
-                )
-                count += 1
-            except Exception as e:
-                logger.error(f"Failed to save alert: {e}")
-        return count
+    def save_signals_as_alerts(self, signals: Union[List[InvestmentSignal], SignalBatch]) -> int:
+        """Save signals (a list or a SignalBatch) to the database as alerts."""
+        if isinstance(signals, SignalBatch):
+            rows = signals.alert_rows()
+        else:
+            rows = [
+                (signal.player_id, signal.signal_type.value, signal.message, signal.current_price)
+                for signal in signals
+            ]
+        
+        try:
+            return self.db.add_alerts_bulk(rows)
+        except Exception as e:
+            logger.error(f"Failed to save alerts: {e}")
+            return 0
     
     def get_player_analysis(self, player_id: int) -> Dict:
         """Get comprehensive analysis for a single player."""
-        player = self.db.get_player(player_id=player_id)
+        player = self.db.get_player_cached(player_id)
         if not player:
             return {}
         
-        history = self.db.get_price_history(player_id, platform=self.platform, days=30)
+        stats = self.db.get_player_stats(player_id, platform=self.platform, days=30)
         latest = self.db.get_latest_price(player_id, platform=self.platform)
         
-        if not history:
+        if not stats:
             return {'player': player, 'message': 'No price history available'}
         
-        prices = [h['price'] for h in history]
-        
         analysis = {
             'player': player,
             'current_price': latest['price'] if latest else None,
-            'price_history_days': len(set(h['recorded_at'].date() for h in history)),
-            'data_points': len(history),
+            'price_history_days': stats['distinct_days'],
+            'data_points': stats['count'],
             'price_range': {
-                'min': min(prices),
-                'max': max(prices),
-                'avg': sum(prices) / len(prices)
+                'min': stats['min'],
+                'max': stats['max'],
+                'avg': stats['avg']
             }
         }
         
         # Calculate trends
-        if len(prices) >= 2:
+        if stats['count'] >= 2:
+            newest, oldest = stats['latest_price'], stats['oldest_price']
             analysis['change_24h'] = {
-                'absolute': prices[0] - prices[-1] if len(prices) > 1 else 0,
-                'percent': ((prices[0] - prices[-1]) / prices[-1] * 100) if prices[-1] else 0
+                'absolute': newest - oldest,
+                'percent': ((newest - oldest) / oldest * 100) if oldest else 0
             }
         
         # Volatility
-        if len(prices) >= 3:
-            import statistics
+        if stats['count'] >= 3:
             analysis['volatility'] = {
-                'std_dev': statistics.stdev(prices),
-                'coefficient': (statistics.stdev(prices) / statistics.mean(prices)) * 100
+                'std_dev': stats['std_dev'],
+                'coefficient': (stats['std_dev'] / stats['avg']) * 100
             }
         
         return analysis
     
     # ========== FUT-Specific Signals ==========
     
-    def check_weekend_league_cycle(self) -> List[InvestmentSignal]:
+    def check_weekend_league_cycle(self, now: datetime = None) -> List[InvestmentSignal]:
         """
         Detect Weekend League trading cycle.
         
@@ -454,67 +744,27 @@ class InvestmentAnalyzer:
         - Saturday-Sunday: WL active, stable/high prices
         """
         signals = []
-        now = datetime.now()
-        day = now.weekday()  # 0=Monday, 6=Sunday
-        hour = now.hour
+        now = now or datetime.now()
+        template = _WL_TEMPLATES.get(now.weekday())  # 0=Monday, 6=Sunday
         
-        # Monday or Tuesday = Buy Window
-        if day in [0, 1]:
+        # Mon-Tue buy, Wed transition, Thu-Fri sell; no signal over the weekend
+        if template:
+            signal_type, message, severity_level, data = template
             signals.append(InvestmentSignal(
                 player_id=0,
                 player_name="[MARKET WIDE]",
                 futbin_id=0,
-                signal_type=SignalType.WL_BUY_WINDOW,
+                signal_type=signal_type,
                 current_price=0,
-                message="🟢 Weekend League BUY WINDOW - Post-WL sell-off, prices typically low",
-                severity='high',
-                data={
-                    'day': ['Monday', 'Tuesday'][day],
-                    'recommendation': 'Buy meta players now, sell Thu-Fri',
-                    'cycle_phase': 'post_wl_dip'
-                },
-                created_at=now
-            ))
-        
-        # Thursday or Friday (especially before 6pm content) = Sell Window
-        elif day in [3, 4]:
-            signals.append(InvestmentSignal(
-                player_id=0,
-                player_name="[MARKET WIDE]",
-                futbin_id=0,
-                signal_type=SignalType.WL_SELL_WINDOW,
-                current_price=0,
-                message="🔴 Weekend League SELL WINDOW - Pre-WL demand high, prices peak",
-                severity='high',
-                data={
-                    'day': ['Thursday', 'Friday'][day - 3],
-                    'recommendation': 'Sell meta players now, buy Mon-Tue',
-                    'cycle_phase': 'pre_wl_peak'
-                },
-                created_at=now
-            ))
-        
-        # Wednesday = Transition
-        elif day == 2:
-            signals.append(InvestmentSignal(
-                player_id=0,
-                player_name="[MARKET WIDE]",
-                futbin_id=0,
-                signal_type=SignalType.WL_BUY_WINDOW,
-                current_price=0,
-                message="🟡 Wednesday - Last chance to buy before prices rise Thu-Fri",
-                severity='medium',
-                data={
-                    'day': 'Wednesday',
-                    'recommendation': 'Final buy window before WL demand kicks in',
-                    'cycle_phase': 'transition'
-                },
+                message=message,
+                severity_level=severity_level,
+                data=dict(data),
                 created_at=now
             ))
         
         return signals
     
-    def check_content_drop_window(self) -> List[InvestmentSignal]:
+    def check_content_drop_window(self, now: datetime = None) -> List[InvestmentSignal]:
         """
         Check if we're near the daily 6pm UK content drop.
         
@@ -522,13 +772,13 @@ class InvestmentAnalyzer:
         Prices can spike or crash depending on content.
         """
         signals = []
-        now = datetime.now()
+        now = now or datetime.now()
         
         # Rough check - 6pm UK is typically 1pm EST, 10am PST
         # We'll just check local time 5-7pm as a proxy
-        hour = now.hour
+        data = _CONTENT_DROP_DATA.get(now.hour)
         
-        if 17 <= hour <= 19:
+        if data:
             signals.append(InvestmentSignal(
                 player_id=0,
                 player_name="[MARKET WIDE]",
@@ -536,33 +786,16 @@ class InvestmentAnalyzer:
                 signal_type=SignalType.CONTENT_DROP,
                 current_price=0,
                 message="⚡ Content drop window - Expect volatility, new promos/SBCs may affect prices",
-                severity='medium',
-                data={
-                    'local_hour': hour,
-                    'recommendation': 'Watch for new SBCs, promos, TOTW. Prices may swing.',
-                    'typical_content': ['New SBCs', 'Promo cards', 'TOTW release (Wed)', 'Flash SBCs']
-                },
+                severity_level=SEVERITY_MEDIUM,
+                data={**data, 'typical_content': list(data['typical_content'])},
                 created_at=now
             ))
         
         return signals
     
-    def get_market_phase(self) -> Dict:
+    def get_market_phase(self, now: datetime = None) -> Dict:
         """Get current market phase based on WL cycle."""
-        now = datetime.now()
-        day = now.weekday()
-        
-        phases = {
-            0: {'phase': 'buy', 'name': 'Monday Dip', 'action': '🟢 BUY', 'desc': 'Post-WL sell-off'},
-            1: {'phase': 'buy', 'name': 'Tuesday Dip', 'action': '🟢 BUY', 'desc': 'Continued low prices'},
-            2: {'phase': 'transition', 'name': 'Wednesday', 'action': '🟡 HOLD/BUY', 'desc': 'Last buy chance'},
-            3: {'phase': 'sell', 'name': 'Thursday Peak', 'action': '🔴 SELL', 'desc': 'WL prep begins'},
-            4: {'phase': 'sell', 'name': 'Friday Peak', 'action': '🔴 SELL', 'desc': 'WL demand peaks'},
-            5: {'phase': 'hold', 'name': 'Saturday WL', 'action': '⚪ HOLD', 'desc': 'WL active'},
-            6: {'phase': 'hold', 'name': 'Sunday WL', 'action': '⚪ HOLD', 'desc': 'WL ending soon'},
-        }
-        
-        return phases.get(day, phases[0])
+        return dict(_MARKET_PHASES[(now or datetime.now()).weekday()])
 
 
 def get_analyzer(platform: str = 'ps') -> InvestmentAnalyzer:
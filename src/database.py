@@ -3,11 +3,19 @@ Database module for HazardPay.
 Handles MongoDB connections and CRUD operations.
 """
 
-from pymongo import MongoClient, DESCENDING, ASCENDING
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import MongoClient, DESCENDING, ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from itertools import islice
+from typing import Any, Optional, List, Dict, Tuple
+import numpy as np
 import os
 import sys
+import time
 import logging
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,6 +23,56 @@ from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Player fields needed by price screens and analytics queries
+PLAYER_SUMMARY_FIELDS = {'futbin_id': 1, 'name': 1, 'rating': 1, 'position': 1, 'slug': 1, 'is_active': 1}
+
+# price_history (player_id, platform, recorded_at, price) index, hinted by per-player queries
+PRICE_HISTORY_INDEX = 'ph_player_platform_time'
+
+# Seconds get_active_players results are reused before re-querying
+ACTIVE_PLAYERS_TTL = 60
+
+# get_player_cached lookups: seconds reused, and players kept (LRU)
+PLAYER_CACHE_TTL = 300
+PLAYER_CACHE_SIZE = 4096
+
+# Collections whose player_id references players._id
+PLAYER_REF_COLLECTIONS = ('price_history', 'alerts', 'watchlist')
+
+# Documents per unordered insert_many in add_prices_bulk
+PRICE_BATCH_SIZE = 1000
+
+# One MongoClient (and connection pool) per URI, shared by every Database instance
+_CLIENT_CACHE: Dict[str, MongoClient] = {}
+
+
+def _get_client(uri: str) -> MongoClient:
+    """Get the shared MongoClient for a URI, creating it on first use."""
+    client = _CLIENT_CACHE.get(uri)
+    if client is None:
+        client = _CLIENT_CACHE.setdefault(uri, MongoClient(
+            uri,
+            maxPoolSize=50,
+            minPoolSize=5,
+            serverSelectionTimeoutMS=3000,
+            retryWrites=True,
+            appname='hazardpay'
+        ))
+    return client
+
+
+def player_oid(player_id):
+    """
+    Player id as stored in price_history, alerts and watchlist (an ObjectId).
+    
+    Values that are not valid ObjectIds are returned unchanged, so lookups
+    on them simply match nothing.
+    """
+    try:
+        return ObjectId(player_id)
+    except (InvalidId, TypeError):
+        return player_id
+
 
 class Database:
     """MongoDB database handler."""
@@ -22,6 +80,10 @@ class Database:
     def __init__(self):
         self.client = None
         self.db = None
+        # get_active_players results per projection: key -> (fetched_at, players)
+        self._active_cache: Dict[Optional[Tuple], Tuple[float, List[Dict]]] = {}
+        # get_player_cached lookups: player_id -> (fetched_at, player)
+        self._player_cache: 'OrderedDict[str, Tuple[float, Dict]]' = OrderedDict()
         self._connect()
     
     def _connect(self):
@@ -29,7 +91,7 @@ class Database:
         uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/hazardpay')
         db_name = os.getenv('DB_NAME', 'hazardpay')
         
-        self.client = MongoClient(uri)
+        self.client = _get_client(uri)
         self.db = self.client[db_name]
         
         # Create indexes on first connection
@@ -39,11 +101,27 @@ class Database:
         """Create indexes for performance."""
         # Players collection
         self.db.players.create_index('futbin_id', unique=True)
-        self.db.players.create_index('is_active')
-        self.db.players.create_index('name')
+        # Active players only, in get_active_players sort order
+        self.db.players.create_index(
+            [('rating', DESCENDING), ('name', ASCENDING)],
+            partialFilterExpression={'is_active': True}
+        )
+        self._drop_index_if_exists(self.db.players, 'is_active_1')
+        # Name lookups are unanchored case-insensitive regexes, which a plain
+        # name index can't seek on
+        self._drop_index_if_exists(self.db.players, 'name_1')
         
-        # Price history collection
-        self.db.price_history.create_index([('player_id', ASCENDING), ('recorded_at', DESCENDING)])
+        # Price history collection: equality fields first, then the sort/range field (ESR).
+        # Trailing price makes latest-price lookups covered by the index; its
+        # prefix supersedes the old (player_id, recorded_at) and
+        # (player_id, platform, recorded_at) indexes. Named so hot queries can hint it.
+        self._drop_index_if_exists(self.db.price_history, 'player_id_1_recorded_at_-1')
+        self._drop_index_if_exists(self.db.price_history, 'player_id_1_platform_1_recorded_at_-1')
+        self._drop_index_if_exists(self.db.price_history, 'player_id_1_platform_1_recorded_at_-1_price_1')
+        self.db.price_history.create_index([
+            ('player_id', ASCENDING), ('platform', ASCENDING), ('recorded_at', DESCENDING),
+            ('price', ASCENDING)
+        ], name=PRICE_HISTORY_INDEX)
         self.db.price_history.create_index([('platform', ASCENDING), ('recorded_at', DESCENDING)])
         
         # Alerts collection
@@ -53,23 +131,69 @@ class Database:
         self.db.watchlist.create_index('player_id', unique=True)
 
         # Signal log collection (diagnostic logging for score analysis)
-        self.db.signal_log.create_index([('player_id', ASCENDING), ('timestamp', DESCENDING)])
+        # Equality fields (player_id, direction) before the timestamp range (ESR)
+        self.db.signal_log.create_index([
+            ('player_id', ASCENDING), ('direction', ASCENDING), ('timestamp', DESCENDING)
+        ])
+        self._drop_index_if_exists(self.db.signal_log, 'player_id_1_timestamp_-1')
         self.db.signal_log.create_index('timestamp', expireAfterSeconds=30*24*3600)  # 30-day TTL
 
         # Players card_type index (for ML pipeline grouping)
         self.db.players.create_index('card_type')
 
-        # Labeled signals collection (permanent training data, no TTL)
-        self.db.labeled_signals.create_index('signal_id', unique=True)
-        self.db.labeled_signals.create_index([('card_type', ASCENDING), ('direction', ASCENDING)])
-        self.db.labeled_signals.create_index('signal_timestamp')
+        # Labeled signals collection (permanent training data, no TTL).
+        # Baselines and the feature matrix filter on direction; the feature
+        # matrix also sorts by signal_timestamp, so one (direction,
+        # signal_timestamp) index serves both and replaces signal_timestamp_1.
+        self._drop_index_if_exists(self.db.labeled_signals, 'signal_timestamp_1')
+        self.db.labeled_signals.create_indexes([
+            IndexModel('signal_id', unique=True),
+            IndexModel([('card_type', ASCENDING), ('direction', ASCENDING)]),
+            IndexModel([('direction', ASCENDING), ('signal_timestamp', ASCENDING)]),
+        ])
+
+        # Long-term price cache, looked up by cache_key (scraper, ML pipeline)
+        self.db.longterm_cache.create_index('cache_key')
+
+        # Scraped card metadata reused across enrichment runs (30-day TTL)
+        self.db.metadata_cache.create_index('futbin_id', unique=True)
+        self.db.metadata_cache.create_index('cached_at', expireAfterSeconds=30*24*3600)
+    
+    @staticmethod
+    def _drop_index_if_exists(collection, name: str):
+        """Drop an index left behind by an older schema."""
+        if name in collection.index_information():
+            collection.drop_index(name)
+            logger.info(f"Dropped redundant index {collection.name}.{name}")
     
     def init_schema(self, schema_path: str = None):
         """Initialize database (MongoDB doesn't need schema, just ensures indexes)."""
         self._ensure_indexes()
         logger.info("Database indexes created successfully")
+        self.migrate_player_ids_to_objectid()
         return True
     
+    def migrate_player_ids_to_objectid(self) -> Dict[str, int]:
+        """
+        Convert string player_id references to ObjectIds.
+        
+        One-shot and idempotent: only string values are touched, and ones
+        that are not valid ObjectIds are left as they are. Returns the number
+        of documents converted per collection.
+        """
+        converted = {}
+        for name in PLAYER_REF_COLLECTIONS:
+            result = self.db[name].update_many(
+                {'player_id': {'$type': 'string'}},
+                [{'$set': {'player_id': {'$convert': {
+                    'input': '$player_id', 'to': 'objectId', 'onError': '$player_id'
+                }}}}]
+            )
+            converted[name] = result.modified_count
+            if result.modified_count:
+                logger.info(f"Converted {result.modified_count} {name} player_id values to ObjectId")
+        return converted
+    
     # ========== Player Operations ==========
     
     def add_player(
@@ -88,6 +212,7 @@ class Database:
         if slug is None:
             slug = name.lower().replace(' ', '-').replace("'", "")
         
+        now = datetime.now()
         player_doc = {
             'futbin_id': futbin_id,
             'name': name,
@@ -99,24 +224,64 @@ class Database:
             'nation': nation,
             'club': club,
             'is_active': True,
-            'updated_at': datetime.now()
+            'updated_at': now
         }
         
         # Upsert - update if exists, insert if not
         result = self.db.players.update_one(
             {'futbin_id': futbin_id},
-            {'$set': player_doc, '$setOnInsert': {'created_at': datetime.now()}},
+            {'$set': player_doc, '$setOnInsert': {'created_at': now}},
             upsert=True
         )
+        self.invalidate_players()
         
         # Get the player ID
         player = self.db.players.find_one({'futbin_id': futbin_id})
         return str(player['_id']) if player else None
     
+    def upsert_players_bulk(self, docs: List[Dict]) -> int:
+        """
+        Add or update many players in one unordered bulk_write.
+        
+        Each dict needs 'futbin_id' and 'name'; other add_player fields are
+        optional. Returns the number of players inserted or matched.
+        """
+        if not docs:
+            return 0
+        
+        now = datetime.now()
+        ops = []
+        for d in docs:
+            slug = d.get('slug') or d['name'].lower().replace(' ', '-').replace("'", "")
+            ops.append(UpdateOne(
+                {'futbin_id': d['futbin_id']},
+                {'$set': {
+                    'futbin_id': d['futbin_id'],
+                    'name': d['name'],
+                    'slug': slug,
+                    'rating': d.get('rating'),
+                    'position': d.get('position'),
+                    'version': d.get('version'),
+                    'league': d.get('league'),
+                    'nation': d.get('nation'),
+                    'club': d.get('club'),
+                    'is_active': True,
+                    'updated_at': now
+                }, '$setOnInsert': {'created_at': now}},
+                upsert=True
+            ))
+        
+        self.invalidate_players()
+        try:
+            result = self.db.players.bulk_write(ops, ordered=False)
+            return result.upserted_count + result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            logger.error(f"Bulk player upsert: {len(details['writeErrors'])} write errors")
+            return details['nUpserted'] + details['nMatched']
+    
     def get_player(self, player_id: str = None, futbin_id: int = None) -> Optional[Dict]:
         """Get a player by internal ID or Futbin ID."""
-        from bson import ObjectId
-        
         if player_id:
             try:
                 player = self.db.players.find_one({'_id': ObjectId(player_id)})
@@ -132,44 +297,90 @@ class Database:
             return player
         return None
     
-    def get_active_players(self) -> List[Dict]:
-        """Get all players marked as active for tracking."""
+    def get_player_cached(self, player_id: str) -> Optional[Dict]:
+        """
+        get_player through a small LRU cache with a TTL.
+        
+        Returns a copy, so callers may modify it. Entries are dropped whenever
+        this instance changes a player.
+        """
+        now = time.monotonic()
+        entry = self._player_cache.get(player_id)
+        if entry and now - entry[0] < PLAYER_CACHE_TTL:
+            self._player_cache.move_to_end(player_id)
+            return dict(entry[1])
+        
+        player = self.get_player(player_id=player_id)
+        if player:
+            self._player_cache[player_id] = (now, player)
+            self._player_cache.move_to_end(player_id)
+            if len(self._player_cache) > PLAYER_CACHE_SIZE:
+                self._player_cache.popitem(last=False)
+            return dict(player)
+        return None
+    
+    def invalidate_players(self, player_id: str = None):
+        """
+        Drop cached player reads (get_player_cached and get_active_players)
+        for one player, or all of them (e.g. after bulk ingest).
+        """
+        self._active_cache.clear()
+        if player_id is None:
+            self._player_cache.clear()
+        else:
+            self._player_cache.pop(str(player_id), None)
+    
+    def get_active_players(self, projection: Dict = None) -> List[Dict]:
+        """
+        Get all players marked as active for tracking.
+        
+        Pass a projection (e.g. PLAYER_SUMMARY_FIELDS) to fetch only the
+        fields the caller uses; the default returns full documents. Results
+        are reused for ACTIVE_PLAYERS_TTL seconds and dropped whenever this
+        instance changes a player; each call returns fresh dict copies, so
+        callers may modify them.
+        """
+        key = tuple(sorted(projection.items())) if projection else None
+        cached = self._active_cache.get(key)
+        if cached and time.monotonic() - cached[0] < ACTIVE_PLAYERS_TTL:
+            return [dict(p) for p in cached[1]]
+        
         players = list(self.db.players.find(
-            {'is_active': True}
+            {'is_active': True}, projection
         ).sort([('rating', DESCENDING), ('name', ASCENDING)]))
         
         for p in players:
             p['id'] = str(p.pop('_id'))
-        return players
+        self._active_cache[key] = (time.monotonic(), players)
+        return [dict(p) for p in players]
     
-    def get_all_players(self) -> List[Dict]:
-        """Get all players."""
-        players = list(self.db.players.find().sort([('rating', DESCENDING), ('name', ASCENDING)]))
+    def get_all_players(self, projection: Dict = None) -> List[Dict]:
+        """Get all players, optionally limited to the projected fields."""
+        players = list(self.db.players.find({}, projection).sort([('rating', DESCENDING), ('name', ASCENDING)]))
         for p in players:
             p['id'] = str(p.pop('_id'))
         return players
     
     def set_player_active(self, player_id: str, active: bool = True) -> bool:
         """Enable or disable tracking for a player."""
-        from bson import ObjectId
-        
         result = self.db.players.update_one(
             {'_id': ObjectId(player_id)},
             {'$set': {'is_active': active, 'updated_at': datetime.now()}}
         )
+        self.invalidate_players(player_id)
         return result.modified_count > 0
     
     def delete_player(self, player_id: str) -> bool:
         """Delete a player and all associated data."""
-        from bson import ObjectId
-        
-        # Delete associated data
-        self.db.price_history.delete_many({'player_id': player_id})
-        self.db.alerts.delete_many({'player_id': player_id})
-        self.db.watchlist.delete_many({'player_id': player_id})
+        # Delete associated data; the collections are independent, so the
+        # deletes run concurrently on the shared connection pool
+        ref = {'player_id': player_oid(player_id)}
+        with ThreadPoolExecutor(max_workers=len(PLAYER_REF_COLLECTIONS)) as pool:
+            list(pool.map(lambda name: self.db[name].delete_many(ref), PLAYER_REF_COLLECTIONS))
         
         # Delete player
         result = self.db.players.delete_one({'_id': ObjectId(player_id)})
+        self.invalidate_players(player_id)
         return result.deleted_count > 0
     
     # ========== Price History Operations ==========
@@ -185,7 +396,7 @@ class Database:
     ) -> Optional[str]:
         """Record a price snapshot for a player."""
         price_doc = {
-            'player_id': player_id,
+            'player_id': player_oid(player_id),
             'price': price,
             'platform': platform,
             'price_min': price_min,
@@ -197,23 +408,40 @@ class Database:
         return str(result.inserted_id) if result.inserted_id else None
     
     def add_prices_bulk(self, prices: List[Dict]) -> int:
-        """Bulk insert price records."""
+        """
+        Bulk insert price records.
+        
+        Price ticks are written unordered, in batches of PRICE_BATCH_SIZE;
+        returns the number of records the server stored.
+        Records without a 'recorded_at' are stamped with the current time.
+        """
         if not prices:
             return 0
         
-        price_docs = []
-        for p in prices:
-            price_docs.append({
-                'player_id': p['player_id'],
+        now = datetime.now()
+        price_docs = [
+            {
+                'player_id': player_oid(p['player_id']),
                 'price': p['price'],
                 'platform': p.get('platform', 'ps'),
                 'price_min': p.get('price_min'),
                 'price_max': p.get('price_max'),
-                'recorded_at': datetime.now()
-            })
+                'recorded_at': p.get('recorded_at') or now
+            }
+            for p in prices
+        ]
         
-        result = self.db.price_history.insert_many(price_docs)
-        return len(result.inserted_ids)
+        inserted = 0
+        docs = iter(price_docs)
+        while batch := list(islice(docs, PRICE_BATCH_SIZE)):
+            try:
+                result = self.db.price_history.insert_many(batch, ordered=False)
+                inserted += len(result.inserted_ids)
+            except BulkWriteError as e:
+                details = e.details
+                logger.error(f"Bulk price insert: {len(details['writeErrors'])} write errors")
+                inserted += details['nInserted']
+        return inserted
     
     def get_price_history(
         self,
@@ -226,12 +454,12 @@ class Database:
         cutoff = datetime.now() - timedelta(days=days)
         
         query = {
-            'player_id': player_id,
+            'player_id': player_oid(player_id),
             'platform': platform,
             'recorded_at': {'$gte': cutoff}
         }
         
-        cursor = self.db.price_history.find(query).sort('recorded_at', DESCENDING)
+        cursor = self.db.price_history.find(query).sort('recorded_at', DESCENDING).hint(PRICE_HISTORY_INDEX)
         
         if limit:
             cursor = cursor.limit(limit)
@@ -239,41 +467,191 @@ class Database:
         prices = list(cursor)
         for p in prices:
             p['id'] = str(p.pop('_id'))
+            p['player_id'] = str(p['player_id'])
         return prices
     
+    def get_price_histories_bulk(
+        self,
+        player_ids: List[str],
+        platform: str = 'ps',
+        days: int = 30,
+        limit: int = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        Get price history for many players in one query.
+        
+        Returns {player_id: prices} with the same per-player ordering, limit
+        and document shape as get_price_history; players without prices map
+        to an empty list.
+        """
+        cutoff = datetime.now() - timedelta(days=days)
+        histories: Dict[str, List[Dict]] = {str(pid): [] for pid in player_ids}
+        
+        query = {
+            'player_id': {'$in': [player_oid(pid) for pid in player_ids]},
+            'platform': platform,
+            'recorded_at': {'$gte': cutoff}
+        }
+        cursor = self.db.price_history.find(query).sort(
+            [('player_id', ASCENDING), ('recorded_at', DESCENDING)]
+        ).hint(PRICE_HISTORY_INDEX)
+        
+        for p in cursor:
+            prices = histories.setdefault(str(p['player_id']), [])
+            if limit and len(prices) >= limit:
+                continue
+            p['id'] = str(p.pop('_id'))
+            p['player_id'] = str(p['player_id'])
+            prices.append(p)
+        return histories
+    
     def get_latest_price(self, player_id: str, platform: str = 'ps') -> Optional[Dict]:
-        """Get the most recent price for a player."""
-        price = self.db.price_history.find_one(
-            {'player_id': player_id, 'platform': platform},
-            sort=[('recorded_at', DESCENDING)]
+        """
+        Get the most recent price for a player.
+        
+        Returns price and recorded_at only, so the query is served from the
+        price_history index without fetching the document.
+        """
+        return self.db.price_history.find_one(
+            {'player_id': player_oid(player_id), 'platform': platform},
+            projection={'_id': 0, 'price': 1, 'recorded_at': 1},
+            sort=[('recorded_at', DESCENDING)],
+            hint=PRICE_HISTORY_INDEX
         )
+    
+    def get_latest_prices_bulk(self, player_ids: List[str], platform: str = 'ps') -> Dict[str, Dict]:
+        """
+        Get the most recent price for many players in one aggregation.
         
-        if price:
-            price['id'] = str(price.pop('_id'))
-            return price
-        return None
+        Returns {player_id: {'price', 'recorded_at'}}, the same fields as
+        get_latest_price; players without prices are left out.
+        """
+        if not player_ids:
+            return {}
+        latest = self._latest_price_docs(player_ids, platform, ('price', 'recorded_at'))
+        return {
+            pid: {'price': doc['price'], 'recorded_at': doc['recorded_at']}
+            for pid, doc in latest.items()
+        }
+    
+    def _aggregate_player_prices(self, player_ids: List[str], platform: str,
+                                 since: Optional[datetime], stages: List[Dict]) -> Dict[str, Dict]:
+        """
+        Run a per-player analytics pipeline over price_history in one query.
+        
+        Matches the players' prices on platform (recorded since `since`, if
+        given), then applies `stages`, which must group by player_id.
+        Returns the resulting docs keyed by string player id.
+        """
+        match = {'player_id': {'$in': [player_oid(pid) for pid in player_ids]}, 'platform': platform}
+        if since is not None:
+            match['recorded_at'] = {'$gte': since}
+        return {
+            str(doc['_id']): doc
+            for doc in self.db.price_history.aggregate([{'$match': match}, *stages], hint=PRICE_HISTORY_INDEX)
+        }
+    
+    def _latest_price_docs(self, player_ids: List[str], platform: str, fields: Tuple[str, ...]) -> Dict[str, Dict]:
+        """Latest price_history fields per player in one aggregation, keyed by player_id."""
+        return self._aggregate_player_prices(player_ids, platform, None, [
+            {'$sort': {'player_id': ASCENDING, 'recorded_at': DESCENDING}},
+            {'$group': {'_id': '$player_id', **{f: {'$first': f'${f}'} for f in fields}}}
+        ])
     
     def get_latest_prices_all(self, platform: str = 'ps') -> List[Dict]:
         """Get latest prices for all active players."""
-        players = self.get_active_players()
-        results = []
+        players = self.get_active_players(PLAYER_SUMMARY_FIELDS)
+        latest = self._latest_price_docs(
+            [p['id'] for p in players], platform, ('price', 'recorded_at')
+        )
         
+        results = []
         for player in players:
-            latest = self.get_latest_price(player['id'], platform)
-            if latest:
+            row = latest.get(player['id'])
+            if row:
                 results.append({
                     'id': player['id'],
                     'futbin_id': player['futbin_id'],
                     'name': player['name'],
                     'rating': player.get('rating'),
                     'position': player.get('position'),
-                    'price': latest['price'],
+                    'price': row['price'],
                     'platform': platform,
-                    'recorded_at': latest['recorded_at']
+                    'recorded_at': row['recorded_at']
                 })
         
         return results
     
+    def get_latest_prices_with_range(self, platform: str = 'ps', players: List[Dict] = None) -> List[Dict]:
+        """
+        Get the latest price and price range for all active players in one query.
+        
+        Returns dicts with id, name, futbin_id, price, price_min and price_max.
+        """
+        if players is None:
+            players = self.get_active_players(PLAYER_SUMMARY_FIELDS)
+        
+        latest = self._latest_price_docs(
+            [p['id'] for p in players], platform, ('price', 'price_min', 'price_max')
+        )
+        
+        results = []
+        for player in players:
+            row = latest.get(player['id'])
+            if row:
+                results.append({
+                    'id': player['id'],
+                    'name': player['name'],
+                    'futbin_id': player['futbin_id'],
+                    'price': row['price'],
+                    'price_min': row.get('price_min'),
+                    'price_max': row.get('price_max')
+                })
+        
+        return results
+    
+    def get_recent_prices_matrix(
+        self,
+        days: int = 3,
+        platform: str = 'ps',
+        players: List[Dict] = None
+    ) -> Tuple[List[str], List[str], List[int], np.ndarray]:
+        """
+        Get recent price snapshots for all active players as one matrix.
+        
+        Each row holds the player's latest days + 1 prices from the last
+        days + 1 days, newest first. Players with fewer than `days` prices
+        are left out; shorter rows are padded with their oldest price so the
+        padding adds no movement.
+        
+        Returns (player_ids, names, futbin_ids, prices) where prices has
+        shape (n_players, days + 1).
+        """
+        if players is None:
+            players = self.get_active_players(PLAYER_SUMMARY_FIELDS)
+        width = days + 1
+        cutoff = datetime.now() - timedelta(days=width)
+        
+        recent = self._aggregate_player_prices([p['id'] for p in players], platform, cutoff, [
+            {'$sort': {'player_id': ASCENDING, 'recorded_at': DESCENDING}},
+            {'$group': {'_id': '$player_id', 'prices': {'$push': '$price'}}},
+            {'$project': {'prices': {'$slice': ['$prices', width]}}}
+        ])
+        
+        ids, names, futbin_ids, rows = [], [], [], []
+        for player in players:
+            doc = recent.get(player['id'])
+            prices = doc['prices'] if doc else None
+            if not prices or len(prices) < max(days, 2):
+                continue
+            ids.append(player['id'])
+            names.append(player['name'])
+            futbin_ids.append(player['futbin_id'])
+            rows.append(prices + [prices[-1]] * (width - len(prices)))
+        
+        matrix = np.array(rows, dtype=np.float64).reshape(len(rows), width)
+        return ids, names, futbin_ids, matrix
+    
     # ========== Price Alerts Operations ==========
     
     def add_alert(
@@ -285,7 +663,7 @@ class Database:
     ) -> Optional[str]:
         """Create a price alert."""
         alert_doc = {
-            'player_id': player_id,
+            'player_id': player_oid(player_id),
             'alert_type': alert_type,
             'message': message,
             'price_at_alert': price_at_alert,
@@ -296,26 +674,141 @@ class Database:
         result = self.db.alerts.insert_one(alert_doc)
         return str(result.inserted_id) if result.inserted_id else None
     
-    def get_unread_alerts(self, limit: int = 50) -> List[Dict]:
-        """Get unread price alerts."""
-        from bson import ObjectId
+    def add_alerts_bulk(self, rows: List[Tuple[str, str, str, int]]) -> int:
+        """
+        Create many alerts in one insert.
+        
+        Each row is (player_id, alert_type, message, price_at_alert).
+        Returns the number of alerts inserted.
+        """
+        if not rows:
+            return 0
         
-        alerts = list(self.db.alerts.find(
-            {'is_read': False}
-        ).sort('created_at', DESCENDING).limit(limit))
+        now = datetime.now()
+        alert_docs = [
+            {
+                'player_id': player_oid(player_id),
+                'alert_type': alert_type,
+                'message': message,
+                'price_at_alert': price_at_alert,
+                'is_read': False,
+                'created_at': now
+            }
+            for player_id, alert_type, message, price_at_alert in rows
+        ]
+        
+        result = self.db.alerts.insert_many(alert_docs)
+        return len(result.inserted_ids)
+    
+    @staticmethod
+    def _player_lookup_stages(as_field: str = 'player') -> List[Dict]:
+        """
+        Stages joining a document's player_id onto players.
+        
+        A plain localField/foreignField $lookup (combining it with a
+        sub-pipeline needs MongoDB 5.0), then the joined players are trimmed
+        to the fields callers read.
+        """
+        return [
+            {'$lookup': {
+                'from': 'players',
+                'localField': 'player_id',
+                'foreignField': '_id',
+                'as': as_field
+            }},
+            {'$addFields': {as_field: {'$map': {
+                'input': f'${as_field}',
+                'as': 'p',
+                'in': {'name': '$$p.name', 'rating': '$$p.rating', 'futbin_id': '$$p.futbin_id', 'slug': '$$p.slug'}
+            }}}},
+        ]
+    
+    @staticmethod
+    def _latest_price_lookup_stage(platform: str, as_field: str = 'latest', player_id: Any = '$player_id') -> Dict:
+        """
+        $lookup stage joining a document's player_id onto its latest price.
+        
+        player_id is the expression for the price_history player_id to match,
+        for collections that do not store it as an ObjectId.
+        """
+        return {'$lookup': {
+            'from': 'price_history',
+            'let': {'pid': player_id},
+            'pipeline': [
+                {'$match': {'$expr': {'$and': [
+                    {'$eq': ['$player_id', '$$pid']},
+                    {'$eq': ['$platform', platform]}
+                ]}}},
+                {'$sort': {'recorded_at': DESCENDING}},
+                {'$limit': 1},
+                {'$project': {'_id': 0, 'price': 1, 'recorded_at': 1}}
+            ],
+            'as': as_field
+        }}
+    
+    def get_portfolio_totals(self, platform: str, closed_since: datetime, tax_rate: float) -> Dict[str, Dict]:
+        """
+        Portfolio summary sums and counts in one $facet aggregation.
+        
+        'open' has count, invested, current_value and unrealized_pl (after
+        tax, over positions with a price); 'closed' covers positions sold
+        since closed_since with count, realized_pl, wins and losses. After-tax
+        sale prices are truncated to whole coins. Empty facets come back as {}.
+        """
+        def after_tax_pl(price: str) -> Dict:
+            return {'$multiply': [
+                {'$subtract': [{'$trunc': {'$multiply': [price, 1 - tax_rate]}}, '$buy_price']},
+                '$quantity'
+            ]}
+        
+        # Portfolio positions store player_id as a string
+        player_oid_expr = {'$convert': {
+            'input': '$player_id', 'to': 'objectId', 'onError': '$player_id', 'onNull': None
+        }}
+        
+        result = next(self.db.portfolio.aggregate([{'$facet': {
+            'open': [
+                {'$match': {'status': 'open'}},
+                self._latest_price_lookup_stage(platform, player_id=player_oid_expr),
+                {'$addFields': {'current_price': {'$arrayElemAt': ['$latest.price', 0]}}},
+                {'$group': {
+                    '_id': None,
+                    'count': {'$sum': 1},
+                    'invested': {'$sum': {'$multiply': ['$buy_price', '$quantity']}},
+                    'current_value': {'$sum': {'$multiply': ['$current_price', '$quantity']}},
+                    'unrealized_pl': {'$sum': after_tax_pl('$current_price')},
+                }},
+            ],
+            'closed': [
+                {'$match': {'status': 'closed', 'sell_date': {'$gte': closed_since}}},
+                {'$addFields': {'profit_after_tax': after_tax_pl('$sell_price')}},
+                {'$group': {
+                    '_id': None,
+                    'count': {'$sum': 1},
+                    'realized_pl': {'$sum': '$profit_after_tax'},
+                    'wins': {'$sum': {'$cond': [{'$gt': ['$profit_after_tax', 0]}, 1, 0]}},
+                    'losses': {'$sum': {'$cond': [{'$lt': ['$profit_after_tax', 0]}, 1, 0]}},
+                }},
+            ],
+        }}]), {})
+        return {facet: (rows[0] if rows else {}) for facet, rows in result.items()}
+    
+    def get_unread_alerts(self, limit: int = 50) -> List[Dict]:
+        """Get unread price alerts, joined with player info in one aggregation."""
+        alerts = self.db.alerts.aggregate([
+            {'$match': {'is_read': False}},
+            {'$sort': {'created_at': DESCENDING}},
+            {'$limit': limit},
+            *self._player_lookup_stages(),
+            {'$unwind': {'path': '$player', 'preserveNullAndEmptyArrays': True}}
+        ])
         
         results = []
         for a in alerts:
-            # Get player info
-            player = None
-            try:
-                player = self.db.players.find_one({'_id': ObjectId(a['player_id'])})
-            except:
-                pass
-            
+            player = a.get('player')
             results.append({
                 'id': str(a['_id']),
-                'player_id': a['player_id'],
+                'player_id': str(a['player_id']),
                 'name': player['name'] if player else 'Unknown',
                 'rating': player.get('rating') if player else None,
                 'futbin_id': player.get('futbin_id') if player else None,
@@ -330,11 +823,18 @@ class Database:
     
     def mark_alerts_read(self, alert_ids: List[str] = None) -> int:
         """Mark alerts as read."""
-        from bson import ObjectId
-        
         if alert_ids:
+            oids = []
+            for aid in alert_ids:
+                try:
+                    oids.append(ObjectId(aid))
+                except (InvalidId, TypeError):
+                    continue
+            if not oids:
+                return 0
+            
             result = self.db.alerts.update_many(
-                {'_id': {'$in': [ObjectId(aid) for aid in alert_ids]}},
+                {'_id': {'$in': oids}, 'is_read': False},
                 {'$set': {'is_read': True}}
             )
         else:
@@ -355,7 +855,7 @@ class Database:
     ) -> Optional[str]:
         """Add a player to watchlist."""
         watchlist_doc = {
-            'player_id': player_id,
+            'player_id': player_oid(player_id),
             'target_buy_price': target_buy_price,
             'target_sell_price': target_sell_price,
             'notes': notes,
@@ -363,34 +863,31 @@ class Database:
         }
         
         result = self.db.watchlist.update_one(
-            {'player_id': player_id},
+            {'player_id': watchlist_doc['player_id']},
             {'$set': watchlist_doc},
             upsert=True
         )
         
         return player_id if result.upserted_id or result.modified_count or result.matched_count else None
     
-    def get_watchlist(self) -> List[Dict]:
+    def get_watchlist(self, platform: str = 'ps') -> List[Dict]:
         """Get all players on watchlist with current prices."""
-        from bson import ObjectId
-        
-        watchlist_items = list(self.db.watchlist.find().sort('added_at', DESCENDING))
+        items = self.db.watchlist.aggregate([
+            {'$sort': {'added_at': DESCENDING}},
+            *self._player_lookup_stages(),
+            {'$unwind': '$player'},
+            self._latest_price_lookup_stage(platform),
+            {'$unwind': {'path': '$latest', 'preserveNullAndEmptyArrays': True}}
+        ])
         
         results = []
-        for item in watchlist_items:
-            try:
-                player = self.db.players.find_one({'_id': ObjectId(item['player_id'])})
-            except:
-                continue
-                
-            if not player:
-                continue
-            
-            latest = self.get_latest_price(item['player_id'], 'ps')
+        for item in items:
+            player = item['player']
+            latest = item.get('latest')
             
             results.append({
                 'id': str(item['_id']),
-                'player_id': item['player_id'],
+                'player_id': str(item['player_id']),
                 'name': player['name'],
                 'rating': player.get('rating'),
                 'futbin_id': player['futbin_id'],
@@ -405,92 +902,135 @@ class Database:
         
         return results
     
-    def remove_from_watchlist(self, player_id: str) -> bool:
-        """Remove a player from watchlist."""
-        result = self.db.watchlist.delete_one({'player_id': player_id})
-        return result.deleted_count > 0
-    
-    # ========== Analytics Queries ==========
-    
-    def get_price_drops(self, threshold_pct: float = 10, platform: str = 'ps') -> List[Dict]:
-        """Get players whose price dropped by more than threshold in 24 hours."""
-        players = self.get_active_players()
-        drops = []
+    def get_watchlist_hits(self, platform: str = 'ps') -> List[Dict]:
+        """
+        Get watchlist entries whose latest price hit their buy or sell target.
         
-        now = datetime.now()
-        yesterday = now - timedelta(hours=24)
-        two_days_ago = now - timedelta(hours=48)
+        The latest price lookup and target comparison run in the database, so
+        only hits come back. Returns one row per hit with hit_type 'buy' or
+        'sell'.
+        """
+        hits = list(self.db.watchlist.aggregate([
+            self._latest_price_lookup_stage(platform),
+            {'$addFields': {'current_price': {'$arrayElemAt': ['$latest.price', 0]}}},
+            {'$addFields': {
+                'hit_buy': {'$and': [
+                    {'$gt': ['$current_price', 0]},
+                    {'$gt': ['$target_buy_price', 0]},
+                    {'$lte': ['$current_price', '$target_buy_price']}
+                ]},
+                'hit_sell': {'$and': [
+                    {'$gt': ['$current_price', 0]},
+                    {'$gt': ['$target_sell_price', 0]},
+                    {'$gte': ['$current_price', '$target_sell_price']}
+                ]}
+            }},
+            {'$match': {'$or': [{'hit_buy': True}, {'hit_sell': True}]}}
+        ]))
         
-        for player in players:
-            # Get current price (last 24h)
-            current = self.db.price_history.find_one(
-                {'player_id': player['id'], 'platform': platform, 'recorded_at': {'$gte': yesterday}},
-                sort=[('recorded_at', DESCENDING)]
-            )
-            
-            # Get previous price (24-48h ago)
-            previous = self.db.price_history.find_one(
-                {'player_id': player['id'], 'platform': platform, 
-                 'recorded_at': {'$gte': two_days_ago, '$lt': yesterday}},
-                sort=[('recorded_at', DESCENDING)]
+        if not hits:
+            return []
+        
+        players = {
+            p['_id']: p
+            for p in self.db.players.find(
+                {'_id': {'$in': [item['player_id'] for item in hits]}}, {'name': 1, 'futbin_id': 1}
             )
+        }
+        
+        results = []
+        for item in hits:
+            player = players.get(item['player_id'])
+            if not player:
+                continue
             
-            if current and previous and previous['price'] > 0:
-                pct_change = ((current['price'] - previous['price']) / previous['price']) * 100
-                
-                if pct_change <= -threshold_pct:
-                    drops.append({
-                        'id': player['id'],
+            for hit_type in ('buy', 'sell'):
+                if item[f'hit_{hit_type}']:
+                    results.append({
+                        'player_id': str(item['player_id']),
                         'name': player['name'],
-                        'rating': player.get('rating'),
-                        'platform': platform,
-                        'current_price': current['price'],
-                        'previous_price': previous['price'],
-                        'price_change': current['price'] - previous['price'],
-                        'pct_change': round(pct_change, 2)
+                        'futbin_id': player['futbin_id'],
+                        'current_price': item['current_price'],
+                        'target_price': item[f'target_{hit_type}_price'],
+                        'notes': item.get('notes'),
+                        'hit_type': hit_type
                     })
         
-        drops.sort(key=lambda x: x['pct_change'])
-        return drops
+        return results
     
-    def get_price_spikes(self, threshold_pct: float = 10, platform: str = 'ps') -> List[Dict]:
-        """Get players whose price increased by more than threshold in 24 hours."""
-        players = self.get_active_players()
-        spikes = []
+    def remove_from_watchlist(self, player_id: str) -> bool:
+        """Remove a player from watchlist."""
+        result = self.db.watchlist.delete_one({'player_id': player_oid(player_id)})
+        return result.deleted_count > 0
+    
+    # ========== Analytics Queries ==========
+    
+    def _get_price_changes(self, threshold_pct: float, direction: str, platform: str = 'ps',
+                           players: List[Dict] = None) -> List[Dict]:
+        """
+        Compare each player's latest price in the last 24h with their latest
+        price 24-48h ago in one aggregation.
+        
+        direction is 'drop' (pct_change <= -threshold) or 'spike'
+        (pct_change >= threshold). Results are sorted by largest move first.
+        """
+        if players is None:
+            players = self.get_active_players(PLAYER_SUMMARY_FIELDS)
+        by_id = {p['id']: p for p in players}
         
         now = datetime.now()
         yesterday = now - timedelta(hours=24)
         two_days_ago = now - timedelta(hours=48)
         
-        for player in players:
-            current = self.db.price_history.find_one(
-                {'player_id': player['id'], 'platform': platform, 'recorded_at': {'$gte': yesterday}},
-                sort=[('recorded_at', DESCENDING)]
-            )
-            
-            previous = self.db.price_history.find_one(
-                {'player_id': player['id'], 'platform': platform,
-                 'recorded_at': {'$gte': two_days_ago, '$lt': yesterday}},
-                sort=[('recorded_at', DESCENDING)]
-            )
-            
-            if current and previous and previous['price'] > 0:
-                pct_change = ((current['price'] - previous['price']) / previous['price']) * 100
-                
-                if pct_change >= threshold_pct:
-                    spikes.append({
-                        'id': player['id'],
-                        'name': player['name'],
-                        'rating': player.get('rating'),
-                        'platform': platform,
-                        'current_price': current['price'],
-                        'previous_price': previous['price'],
-                        'price_change': current['price'] - previous['price'],
-                        'pct_change': round(pct_change, 2)
-                    })
+        if direction == 'drop':
+            threshold_match = {'$lte': -threshold_pct}
+        else:
+            threshold_match = {'$gte': threshold_pct}
         
-        spikes.sort(key=lambda x: x['pct_change'], reverse=True)
-        return spikes
+        changed = self._aggregate_player_prices(list(by_id), platform, two_days_ago, [
+            {'$sort': {'player_id': ASCENDING, 'recorded_at': DESCENDING}},
+            # Latest price in each window: current (last 24h) and previous (24-48h ago)
+            {'$group': {
+                '_id': {'player_id': '$player_id', 'current': {'$gte': ['$recorded_at', yesterday]}},
+                'price': {'$first': '$price'}
+            }},
+            {'$group': {
+                '_id': '$_id.player_id',
+                'current': {'$max': {'$cond': ['$_id.current', '$price', None]}},
+                'previous': {'$max': {'$cond': ['$_id.current', None, '$price']}}
+            }},
+            {'$match': {'current': {'$ne': None}, 'previous': {'$gt': 0}}},
+            {'$addFields': {'price_change': {'$subtract': ['$current', '$previous']}}},
+            {'$addFields': {'pct_change': {'$multiply': [{'$divide': ['$price_change', '$previous']}, 100]}}},
+            {'$match': {'pct_change': threshold_match}}
+        ])
+        
+        changes = []
+        for player_id, doc in changed.items():
+            player = by_id[player_id]
+            changes.append({
+                'id': player['id'],
+                'name': player['name'],
+                'rating': player.get('rating'),
+                'platform': platform,
+                'current_price': doc['current'],
+                'previous_price': doc['previous'],
+                'price_change': doc['price_change'],
+                'pct_change': round(doc['pct_change'], 2)
+            })
+        
+        changes.sort(key=lambda x: x['pct_change'], reverse=(direction != 'drop'))
+        return changes
+    
+    def get_price_drops(self, threshold_pct: float = 10, platform: str = 'ps',
+                        players: List[Dict] = None) -> List[Dict]:
+        """Get players whose price dropped by more than threshold in 24 hours."""
+        return self._get_price_changes(threshold_pct, 'drop', platform=platform, players=players)
+    
+    def get_price_spikes(self, threshold_pct: float = 10, platform: str = 'ps',
+                         players: List[Dict] = None) -> List[Dict]:
+        """Get players whose price increased by more than threshold in 24 hours."""
+        return self._get_price_changes(threshold_pct, 'spike', platform=platform, players=players)
     
     # ========== Signal Log Operations ==========
 
@@ -515,26 +1055,35 @@ class Database:
         return logs
 
     def get_signal_summary(self, player_id: str, hours: int = 24) -> Optional[Dict]:
-        """Get aggregated signal stats for a player."""
+        """Get aggregated signal stats for a player, reduced in one aggregation."""
         cutoff = datetime.now() - timedelta(hours=hours)
-        logs = list(self.db.signal_log.find({
-            'player_id': player_id,
-            'timestamp': {'$gte': cutoff}
-        }))
+        summary = next(self.db.signal_log.aggregate([
+            {'$match': {'player_id': player_id, 'timestamp': {'$gte': cutoff}}},
+            {'$sort': {'timestamp': DESCENDING}},
+            {'$group': {
+                '_id': None,
+                'count': {'$sum': 1},
+                'avg_score': {'$avg': '$final_score'},
+                'min_score': {'$min': '$final_score'},
+                'max_score': {'$max': '$final_score'},
+                'latest_score': {'$first': '$final_score'},
+                'buys': {'$sum': {'$cond': [{'$eq': ['$direction', 'BUY']}, 1, 0]}},
+                'sells': {'$sum': {'$cond': [{'$eq': ['$direction', 'SELL']}, 1, 0]}}
+            }}
+        ]), None)
 
-        if not logs:
+        if not summary or not summary['count']:
             return None
 
-        scores = [l['final_score'] for l in logs]
         return {
-            'count': len(logs),
-            'avg_score': sum(scores) / len(scores),
-            'min_score': min(scores),
-            'max_score': max(scores),
-            'latest_score': logs[0]['final_score'] if logs else None,
+            'count': summary['count'],
+            'avg_score': summary['avg_score'],
+            'min_score': summary['min_score'],
+            'max_score': summary['max_score'],
+            'latest_score': summary['latest_score'],
             'directions': {
-                'BUY': len([l for l in logs if l.get('direction') == 'BUY']),
-                'SELL': len([l for l in logs if l.get('direction') == 'SELL']),
+                'BUY': summary['buys'],
+                'SELL': summary['sells'],
             }
         }
 
@@ -559,28 +1108,69 @@ class Database:
             {'futbin_id': futbin_id},
             update
         )
+        self.invalidate_players()
         return result.modified_count > 0
 
-    def get_volatility_scores(self, days: int = 7, platform: str = 'ps') -> List[Dict]:
-        """Calculate price volatility for players over N days."""
-        import statistics
+    def get_player_stats(self, player_id: str, platform: str = 'ps', days: int = 30) -> Optional[Dict]:
+        """
+        Get price statistics for a player over the last N days in one aggregation.
         
-        players = self.get_active_players()
-        volatility_data = []
+        Returns oldest_price, latest_price, avg, std_dev (sample, None with
+        fewer than 2 points), min, max, count and distinct_days, or None if
+        there is no history in the window.
+        """
+        cutoff = datetime.now() - timedelta(days=days)
+        
+        result = list(self.db.price_history.aggregate([
+            {'$match': {'player_id': player_oid(player_id), 'platform': platform, 'recorded_at': {'$gte': cutoff}}},
+            {'$sort': {'recorded_at': ASCENDING}},
+            {'$group': {
+                '_id': None,
+                'oldest_price': {'$first': '$price'},
+                'latest_price': {'$last': '$price'},
+                'avg': {'$avg': '$price'},
+                'std_dev': {'$stdDevSamp': '$price'},
+                'min': {'$min': '$price'},
+                'max': {'$max': '$price'},
+                'count': {'$sum': 1},
+                'days': {'$addToSet': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$recorded_at'}}}
+            }},
+            {'$addFields': {'distinct_days': {'$size': '$days'}}},
+            {'$project': {'_id': 0, 'days': 0}}
+        ], hint=PRICE_HISTORY_INDEX))
+        
+        return result[0] if result else None
+    
+    def get_volatility_scores(self, days: int = 7, platform: str = 'ps',
+                              players: List[Dict] = None) -> List[Dict]:
+        """
+        Calculate price volatility for players over N days.
+        
+        Mean, sample standard deviation and count are computed per player in
+        one aggregation; players with fewer than 3 prices are left out.
+        """
+        if players is None:
+            players = self.get_active_players(PLAYER_SUMMARY_FIELDS)
         
         cutoff = datetime.now() - timedelta(days=days)
+        stats = self._aggregate_player_prices([p['id'] for p in players], platform, cutoff, [
+            {'$group': {
+                '_id': '$player_id',
+                'avg': {'$avg': '$price'},
+                'std': {'$stdDevSamp': '$price'},
+                'n': {'$sum': 1}
+            }},
+            {'$match': {'n': {'$gte': 3}}}
+        ])
         
+        volatility_data = []
         for player in players:
-            prices = list(self.db.price_history.find(
-                {'player_id': player['id'], 'platform': platform, 'recorded_at': {'$gte': cutoff}}
-            ))
-            
-            if len(prices) < 3:
+            doc = stats.get(player['id'])
+            if not doc:
                 continue
             
-            price_values = [p['price'] for p in prices]
-            avg_price = statistics.mean(price_values)
-            std_dev = statistics.stdev(price_values)
+            avg_price = doc['avg']
+            std_dev = doc['std']
             volatility_pct = (std_dev / avg_price) * 100 if avg_price > 0 else 0
             
             volatility_data.append({
@@ -588,7 +1178,7 @@ class Database:
                 'name': player['name'],
                 'rating': player.get('rating'),
                 'futbin_id': player['futbin_id'],
-                'data_points': len(prices),
+                'data_points': doc['n'],
                 'avg_price': avg_price,
                 'std_dev': std_dev,
                 'volatility_pct': round(volatility_pct, 2)
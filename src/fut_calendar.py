@@ -3,10 +3,12 @@ FUT Calendar & Market Dynamics Module.
 Based on comprehensive FIFA 23-FC 26 market research.
 """
 
+from bisect import bisect_right
 from datetime import datetime, timedelta
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, Mapping, Optional
 from enum import Enum
+from types import MappingProxyType
 
 
 class MarketPhase(Enum):
@@ -128,6 +130,157 @@ FC26_CALENDAR = [
     ),
 ]
 
+# Start/end dates of the (chronologically ordered) calendar, for bisect lookups
+_START_DATES = [e.start_date for e in FC26_CALENDAR]
+_END_DATES = [e.end_date for e in FC26_CALENDAR]
+
+# Major/extreme crash events and their start dates
+_CRASH_EVENTS = [e for e in FC26_CALENDAR if e.crash_severity in ('major', 'extreme')]
+_CRASH_START_DATES = [e.start_date for e in _CRASH_EVENTS]
+
+
+# ========== Market Cycle Tables ==========
+
+# Annual market phase per month (read-only; returned as-is by get_current_phase)
+_EARLY_PHASE = MappingProxyType({
+    'phase': MarketPhase.EARLY,
+    'name': 'Early Cycle',
+    'description': 'High prices, low supply. Base golds and ICONs at peak.',
+    'strategy': 'SELL meta cards. Prices only go down from here.',
+    'icon': '📈'
+})
+_MID_PHASE = MappingProxyType({
+    'phase': MarketPhase.MID,
+    'name': 'Mid Cycle',
+    'description': 'Gradual decline with major crashes (BF, TOTY).',
+    'strategy': 'Trade the crashes. Buy dips, sell recoveries.',
+    'icon': '📊'
+})
+_LATE_PHASE = MappingProxyType({
+    'phase': MarketPhase.LATE,
+    'name': 'Late Cycle (TOTS)',
+    'description': 'TOTS causes sustained depreciation.',
+    'strategy': 'Only buy TOTS cards. Everything else loses value.',
+    'icon': '📉'
+})
+_END_PHASE = MappingProxyType({
+    'phase': MarketPhase.END,
+    'name': 'End Cycle',
+    'description': 'FUTTIES and pre-season. Market collapse.',
+    'strategy': 'Minimal trading. Cards approach discard.',
+    'icon': '💀'
+})
+_MONTH_PHASES = {
+    9: _EARLY_PHASE, 10: _EARLY_PHASE,
+    11: _MID_PHASE, 12: _MID_PHASE, 1: _MID_PHASE, 2: _MID_PHASE,
+    3: _LATE_PHASE, 4: _LATE_PHASE, 5: _LATE_PHASE,
+    6: _END_PHASE, 7: _END_PHASE, 8: _END_PHASE,
+}
+
+# Weekly cycle, keyed by weekday (0=Mon, 6=Sun)
+_WEEKLY_PHASES = {
+    0: {  # Monday
+        'day': 'Monday',
+        'phase': 'post_wl_selloff',
+        'action': '🟢 BUY',
+        'priority': 'high',
+        'description': 'Weekend League ended. Players selling off squads.',
+        'strategy': 'Secondary buy window. Good for sniping panic sellers.'
+    },
+    1: {  # Tuesday
+        'day': 'Tuesday',
+        'phase': 'recovery_start',
+        'action': '🟢 BUY',
+        'priority': 'medium',
+        'description': 'Market stabilizing after sell-off.',
+        'strategy': 'Last chance before Thursday demand.'
+    },
+    2: {  # Wednesday
+        'day': 'Wednesday',
+        'phase': 'pre_rewards_dip',
+        'action': '🟢 BUY',
+        'priority': 'high',
+        'description': 'Players await Rivals rewards. Low liquidity = opportunities.',
+        'strategy': 'BEST buying window before Thursday flood.'
+    },
+    3: {  # Thursday
+        'day': 'Thursday',
+        'phase': 'rewards_day',
+        'action': '🟢🔴',
+        'priority': 'critical',
+        'description': 'MOST IMPORTANT DAY. Rivals rewards drop.',
+        'strategy': 'Morning: BUY (packs flood market, -10-15%). Afternoon: prices recover. Evening: SELL prep.'
+    },
+    4: {  # Friday
+        'day': 'Friday',
+        'phase': 'content_and_wl_prep',
+        'action': '🔴 SELL',
+        'priority': 'high',
+        'description': '6PM UK content drop. Weekend League prep.',
+        'strategy': 'SELL meta cards. Peak demand as players finalize WL squads.'
+    },
+    5: {  # Saturday
+        'day': 'Saturday',
+        'phase': 'wl_active',
+        'action': '⚪ HOLD',
+        'priority': 'low',
+        'description': 'Weekend League active. Stable prices.',
+        'strategy': 'Avoid trading. Focus on playing or wait for Monday.'
+    },
+    6: {  # Sunday
+        'day': 'Sunday',
+        'phase': 'wl_ending',
+        'action': '⚪ HOLD',
+        'priority': 'low',
+        'description': 'Weekend League winding down.',
+        'strategy': 'Prepare buy list for Monday sell-off.'
+    }
+}
+
+# Trading windows by time of day (rough local approximations), indexed by hour.
+# Read-only so get_daily_windows can hand out the shared bucket directly.
+_NIGHT_WINDOW = MappingProxyType({
+    'window': 'Off-Peak (Night)',
+    'action': '🟢 BUY',
+    'description': 'Lowest demand. Overnight flipping opportunities.',
+    'liquidity': 'low'
+})
+_MORNING_WINDOW = MappingProxyType({
+    'window': 'Morning',
+    'action': '🟡 MIXED',
+    'description': 'Moderate activity. EU waking up.',
+    'liquidity': 'medium'
+})
+_AFTERNOON_WINDOW = MappingProxyType({
+    'window': 'Afternoon',
+    'action': '🟡 MIXED',
+    'description': 'Building toward peak. NA coming online.',
+    'liquidity': 'medium-high'
+})
+_PEAK_WINDOW = MappingProxyType({
+    'window': 'Peak Hours (6PM-10PM)',
+    'action': '🔴 SELL',
+    'description': 'Highest demand. Best time to sell.',
+    'liquidity': 'high'
+})
+_LATE_NIGHT_WINDOW = MappingProxyType({
+    'window': 'Late Night',
+    'action': '🟢 BUY',
+    'description': 'Demand dropping. Deals appearing.',
+    'liquidity': 'medium-low'
+})
+_HOUR_WINDOWS = tuple(
+    _NIGHT_WINDOW if 2 <= hour < 7 else
+    _MORNING_WINDOW if 7 <= hour < 12 else
+    _AFTERNOON_WINDOW if 12 <= hour < 17 else
+    _PEAK_WINDOW if 17 <= hour < 22 else
+    _LATE_NIGHT_WINDOW
+    for hour in range(24)
+)
+
+# Hours near the 6PM UK content drop (rough local approximation)
+_CONTENT_DROP_HOURS = tuple(17 <= hour <= 19 for hour in range(24))
+
 
 class FUTCalendar:
     """FUT market calendar and timing utilities."""
@@ -135,139 +288,47 @@ class FUTCalendar:
     def __init__(self):
         self.events = FC26_CALENDAR
     
-    def get_current_phase(self) -> Dict:
-        """Get the current annual market phase."""
-        now = datetime.now()
-        month = now.month
-        
-        if month in [9, 10]:
-            return {
-                'phase': MarketPhase.EARLY,
-                'name': 'Early Cycle',
-                'description': 'High prices, low supply. Base golds and ICONs at peak.',
-                'strategy': 'SELL meta cards. Prices only go down from here.',
-                'icon': '📈'
-            }
-        elif month in [11, 12, 1, 2]:
-            return {
-                'phase': MarketPhase.MID,
-                'name': 'Mid Cycle',
-                'description': 'Gradual decline with major crashes (BF, TOTY).',
-                'strategy': 'Trade the crashes. Buy dips, sell recoveries.',
-                'icon': '📊'
-            }
-        elif month in [3, 4, 5]:
-            return {
-                'phase': MarketPhase.LATE,
-                'name': 'Late Cycle (TOTS)',
-                'description': 'TOTS causes sustained depreciation.',
-                'strategy': 'Only buy TOTS cards. Everything else loses value.',
-                'icon': '📉'
-            }
-        else:  # 6, 7, 8
-            return {
-                'phase': MarketPhase.END,
-                'name': 'End Cycle',
-                'description': 'FUTTIES and pre-season. Market collapse.',
-                'strategy': 'Minimal trading. Cards approach discard.',
-                'icon': '💀'
-            }
+    def get_current_phase(self, *, now: Optional[datetime] = None) -> Mapping:
+        """Get the current annual market phase (read-only)."""
+        return _MONTH_PHASES[(now or datetime.now()).month]
     
-    def get_active_promo(self) -> Optional[PromoEvent]:
+    def get_active_promo(self, *, now: Optional[datetime] = None) -> Optional[PromoEvent]:
         """Get currently active promo if any."""
-        now = datetime.now()
-        for event in self.events:
-            if event.start_date <= now <= event.end_date:
-                return event
-        return None
+        now = now or datetime.now()
+        # Latest event started by now, stepping back over any earlier event
+        # that still overlaps it (the earliest active one wins)
+        i = bisect_right(_START_DATES, now) - 1
+        active = None
+        while i >= 0 and _END_DATES[i] >= now:
+            active = FC26_CALENDAR[i]
+            i -= 1
+        return active
     
-    def get_next_promo(self) -> Optional[PromoEvent]:
+    def get_next_promo(self, *, now: Optional[datetime] = None) -> Optional[PromoEvent]:
         """Get the next upcoming promo."""
-        now = datetime.now()
-        future = [e for e in self.events if e.start_date > now]
-        return future[0] if future else None
+        i = bisect_right(_START_DATES, now or datetime.now())
+        return FC26_CALENDAR[i] if i < len(FC26_CALENDAR) else None
     
-    def get_next_crash(self) -> Optional[PromoEvent]:
+    def get_next_crash(self, *, now: Optional[datetime] = None) -> Optional[PromoEvent]:
         """Get the next major/extreme crash event."""
-        now = datetime.now()
-        crashes = [e for e in self.events 
-                   if e.start_date > now and e.crash_severity in ['major', 'extreme']]
-        return crashes[0] if crashes else None
+        i = bisect_right(_CRASH_START_DATES, now or datetime.now())
+        return _CRASH_EVENTS[i] if i < len(_CRASH_EVENTS) else None
     
     def days_until_event(self, event: PromoEvent) -> int:
         """Days until a specific event."""
         return (event.start_date - datetime.now()).days
     
-    def get_weekly_phase(self) -> Dict:
+    def get_weekly_phase(self, *, now: Optional[datetime] = None) -> Dict:
         """
         Get current position in the weekly cycle.
         
         Key insight: Thursday rewards is the most important day.
         """
-        now = datetime.now()
+        now = now or datetime.now()
         day = now.weekday()  # 0=Mon, 6=Sun
         hour = now.hour
         
-        phases = {
-            0: {  # Monday
-                'day': 'Monday',
-                'phase': 'post_wl_selloff',
-                'action': '🟢 BUY',
-                'priority': 'high',
-                'description': 'Weekend League ended. Players selling off squads.',
-                'strategy': 'Secondary buy window. Good for sniping panic sellers.'
-            },
-            1: {  # Tuesday
-                'day': 'Tuesday',
-                'phase': 'recovery_start',
-                'action': '🟢 BUY',
-                'priority': 'medium',
-                'description': 'Market stabilizing after sell-off.',
-                'strategy': 'Last chance before Thursday demand.'
-            },
-            2: {  # Wednesday
-                'day': 'Wednesday',
-                'phase': 'pre_rewards_dip',
-                'action': '🟢 BUY',
-                'priority': 'high',
-                'description': 'Players await Rivals rewards. Low liquidity = opportunities.',
-                'strategy': 'BEST buying window before Thursday flood.'
-            },
-            3: {  # Thursday
-                'day': 'Thursday',
-                'phase': 'rewards_day',
-                'action': '🟢🔴',
-                'priority': 'critical',
-                'description': 'MOST IMPORTANT DAY. Rivals rewards drop.',
-                'strategy': 'Morning: BUY (packs flood market, -10-15%). Afternoon: prices recover. Evening: SELL prep.'
-            },
-            4: {  # Friday
-                'day': 'Friday',
-                'phase': 'content_and_wl_prep',
-                'action': '🔴 SELL',
-                'priority': 'high',
-                'description': '6PM UK content drop. Weekend League prep.',
-                'strategy': 'SELL meta cards. Peak demand as players finalize WL squads.'
-            },
-            5: {  # Saturday
-                'day': 'Saturday',
-                'phase': 'wl_active',
-                'action': '⚪ HOLD',
-                'priority': 'low',
-                'description': 'Weekend League active. Stable prices.',
-                'strategy': 'Avoid trading. Focus on playing or wait for Monday.'
-            },
-            6: {  # Sunday
-                'day': 'Sunday',
-                'phase': 'wl_ending',
-                'action': '⚪ HOLD',
-                'priority': 'low',
-                'description': 'Weekend League winding down.',
-                'strategy': 'Prepare buy list for Monday sell-off.'
-            }
-        }
-        
-        phase = phases[day]
+        phase = dict(_WEEKLY_PHASES[day])
         
         # Thursday has morning/afternoon/evening nuance
         if day == 3:
@@ -280,59 +341,22 @@ class FUTCalendar:
         
         return phase
     
-    def get_daily_windows(self) -> Dict:
-        """Get optimal trading windows based on time of day."""
-        now = datetime.now()
-        hour = now.hour
-        
-        # Times are rough local approximations
-        if 2 <= hour < 7:
-            return {
-                'window': 'Off-Peak (Night)',
-                'action': '🟢 BUY',
-                'description': 'Lowest demand. Overnight flipping opportunities.',
-                'liquidity': 'low'
-            }
-        elif 7 <= hour < 12:
-            return {
-                'window': 'Morning',
-                'action': '🟡 MIXED',
-                'description': 'Moderate activity. EU waking up.',
-                'liquidity': 'medium'
-            }
-        elif 12 <= hour < 17:
-            return {
-                'window': 'Afternoon',
-                'action': '🟡 MIXED',
-                'description': 'Building toward peak. NA coming online.',
-                'liquidity': 'medium-high'
-            }
-        elif 17 <= hour < 22:
-            return {
-                'window': 'Peak Hours (6PM-10PM)',
-                'action': '🔴 SELL',
-                'description': 'Highest demand. Best time to sell.',
-                'liquidity': 'high'
-            }
-        else:
-            return {
-                'window': 'Late Night',
-                'action': '🟢 BUY',
-                'description': 'Demand dropping. Deals appearing.',
-                'liquidity': 'medium-low'
-            }
+    def get_daily_windows(self, *, now: Optional[datetime] = None) -> Mapping:
+        """Get optimal trading windows based on time of day (read-only)."""
+        return _HOUR_WINDOWS[(now or datetime.now()).hour]
     
     def is_content_drop_window(self) -> bool:
         """Check if we're near 6PM UK content drop (rough local approximation)."""
-        hour = datetime.now().hour
         # This is approximate - would need timezone handling for accuracy
-        return 17 <= hour <= 19
+        return _CONTENT_DROP_HOURS[datetime.now().hour]
     
     def get_fodder_advice(self) -> Dict:
         """Get current fodder investment advice."""
-        active = self.get_active_promo()
-        next_crash = self.get_next_crash()
-        weekly = self.get_weekly_phase()
+        # One clock read shared by every helper below
+        now = datetime.now()
+        active = self.get_active_promo(now=now)
+        next_crash = self.get_next_crash(now=now)
+        weekly = self.get_weekly_phase(now=now)
         
         advice = {
             'low_fodder': {  # 82-84
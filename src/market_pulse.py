@@ -12,17 +12,90 @@ This uses your tracked players as a "market index" to understand conditions.
 """
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass, field
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to NumPy
+    njit = None
+
 from .database import get_db, Database
 from .scraper import FutbinScraper
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent per-player lookups in get_pulse
+PULSE_MAX_WORKERS = 16
+
+# Seconds a computed pulse is reused by get_pulse (fetch_fresh bypasses it)
+PULSE_CACHE_TTL = 300
+
+# Seconds a player with too little long-term history is skipped by get_pulse
+INSUFFICIENT_HISTORY_TTL = 24 * 3600
+
+# Enriched card_type -> pulse category
+_CATEGORY_MAP = {
+    'ICON': 'Icons',
+    'HERO': 'Heroes',
+    'TOTY': 'TOTY',
+    'TOTW': 'TOTW',
+    'PROMO': 'TOTW',  # Treat promos like TOTW for market analysis
+}
+
+
+def _reduce_pulse_numpy(positions: np.ndarray, changes: np.ndarray) -> Tuple[float, float, float, float, float]:
+    """Average position and % at lows/highs and trending down/up."""
+    return (
+        float(positions.mean()),
+        float((positions <= 25).mean()) * 100,
+        float((positions >= 75).mean()) * 100,
+        float((changes < -2).mean()) * 100,
+        float((changes > 2).mean()) * 100,
+    )
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _reduce_pulse(positions, changes):
+        """Single-pass JIT version of _reduce_pulse_numpy."""
+        n = positions.shape[0]
+        sum_pos = 0.0
+        n_lows = 0
+        n_highs = 0
+        n_down = 0
+        n_up = 0
+        
+        for i in range(n):
+            pos = positions[i]
+            sum_pos += pos
+            if pos <= 25:
+                n_lows += 1
+            if pos >= 75:
+                n_highs += 1
+            change = changes[i]
+            if change < -2:
+                n_down += 1
+            elif change > 2:
+                n_up += 1
+        
+        return (
+            sum_pos / n,
+            n_lows / n * 100,
+            n_highs / n * 100,
+            n_down / n * 100,
+            n_up / n * 100,
+        )
+else:
+    _reduce_pulse = _reduce_pulse_numpy
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CategoryPulse:
     """Pulse data for a specific player category."""
     name: str
@@ -43,9 +116,73 @@ class CategoryPulse:
             'HIGH': '🟠',
             'INFLATED': '🔴'
         }.get(self.status, '⚪')
+    
+    @classmethod
+    def empty(cls, name: str) -> 'CategoryPulse':
+        """Neutral pulse for a category with no analyzed players."""
+        return cls(
+            name=name, count=0, avg_position=50,
+            pct_at_lows=0, pct_at_highs=0,
+            pct_trending_down=0, pct_trending_up=0,
+            status='NORMAL'
+        )
+    
+    @classmethod
+    def from_metrics(
+        cls,
+        name: str,
+        count: int,
+        avg_position: float,
+        pct_at_lows: float,
+        pct_at_highs: float,
+        pct_trending_down: float,
+        pct_trending_up: float
+    ) -> 'CategoryPulse':
+        """Build a pulse, classifying its status from the range metrics."""
+        if avg_position <= 20 or pct_at_lows >= 60:
+            status = 'CRASHED'
+        elif avg_position <= 35:
+            status = 'LOW'
+        elif avg_position >= 75 or pct_at_highs >= 50:
+            status = 'INFLATED'
+        elif avg_position >= 60:
+            status = 'HIGH'
+        else:
+            status = 'NORMAL'
+        
+        return cls(
+            name=name,
+            count=count,
+            avg_position=avg_position,
+            pct_at_lows=pct_at_lows,
+            pct_at_highs=pct_at_highs,
+            pct_trending_down=pct_trending_down,
+            pct_trending_up=pct_trending_up,
+            status=status
+        )
+    
+    @classmethod
+    def merge(cls, name: str, parts: Iterable['CategoryPulse']) -> 'CategoryPulse':
+        """Combine category pulses into one, weighting each metric by count."""
+        parts = [c for c in parts if c.count]
+        count = sum(c.count for c in parts)
+        if not count:
+            return cls.empty(name)
+        
+        def weighted(attr: str) -> float:
+            return sum(getattr(c, attr) * c.count for c in parts) / count
+        
+        return cls.from_metrics(
+            name, count,
+            weighted('avg_position'),
+            weighted('pct_at_lows'),
+            weighted('pct_at_highs'),
+            weighted('pct_trending_down'),
+            weighted('pct_trending_up')
+        )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MarketPulse:
     """Current market health status."""
     
@@ -61,7 +198,6 @@ class MarketPulse:
     avg_position_in_range: float  # Average position (0-100%) across all players
     
     # Interpretation
-    summary: str
     buy_sentiment: str  # 'GREAT', 'GOOD', 'NEUTRAL', 'RISKY', 'AVOID'
     sell_sentiment: str
     
@@ -73,6 +209,19 @@ class MarketPulse:
     categories: Dict[str, CategoryPulse] = field(default_factory=dict)
     fodder_status: str = "Unknown"
     fodder_avg_position: float = 50
+    
+    @property
+    def summary(self) -> str:
+        """One-line interpretation of the status, formatted on demand."""
+        if self.status == "CRASHED":
+            return f"🟢 MARKET CRASHED - {self.pct_at_lows:.0f}% of players near all-time lows. BUY WINDOW!"
+        if self.status == "CRASHING":
+            return f"🔻 MARKET CRASHING - {self.pct_trending_down:.0f}% trending down. Wait for floor."
+        if self.status == "INFLATED":
+            return f"🔴 MARKET INFLATED - {self.pct_at_highs:.0f}% near all-time highs. Risky to buy."
+        if self.status == "RECOVERING":
+            return f"📈 MARKET RECOVERING - {self.pct_trending_up:.0f}% trending up from lows."
+        return f"➖ MARKET STABLE - Average position {self.avg_position_in_range:.0f}%. Normal conditions."
 
 
 class MarketPulseAnalyzer:
@@ -86,89 +235,123 @@ class MarketPulseAnalyzer:
     - If MOST are at highs, market is inflated (SELL or wait)
     """
     
-    def __init__(self, db: Database = None, platform: str = 'ps'):
+    def __init__(self, db: Database = None, platform: str = 'ps', cache_ttl: int = PULSE_CACHE_TTL):
         self.db = db or get_db()
         self.platform = platform
-        self.scraper = FutbinScraper(platform=platform)
+        # Scraper is created on first use (see the scraper property)
+        self._scraper: Optional[FutbinScraper] = None
+        self._scraper_lock = threading.Lock()
+        self.cache_ttl = cache_ttl
+        # Last computed pulse and when it was computed
+        self._cached: Optional[Tuple[datetime, MarketPulse]] = None
+        # futbin_id -> when it was found to have < 10 long-term data points
+        self._insufficient_history: Dict[int, datetime] = {}
     
-    def _categorize_player(self, player: dict, current_price: int, all_time_high: int) -> str:
-        """Determine category, preferring stored card_type from enrichment."""
-        # Use enriched card_type if available
-        stored = player.get('card_type')
-        if stored:
-            category_map = {
-                'ICON': 'Icons',
-                'HERO': 'Heroes',
-                'TOTY': 'TOTY',
-                'TOTW': 'TOTW',
-                'PROMO': 'TOTW',  # Treat promos like TOTW for market analysis
-            }
-            if stored in category_map:
-                return category_map[stored]
-            # GOLD_RARE, SILVER, BRONZE, OTHER fall through to fodder classification
-
-        # Fallback: ID-based heuristics for un-enriched players
-        futbin_id = player.get('futbin_id', 0)
-        if 18699 <= futbin_id <= 21500 and all_time_high >= 200000:
-            return 'Icons'
-        if 18800 <= futbin_id <= 18900:
-            return 'Heroes'
-        if 21760 <= futbin_id <= 21780 and all_time_high >= 500000:
-            return 'TOTY'
-        if 20000 <= futbin_id <= 22500 and 10000 <= current_price <= 50000:
-            return 'TOTW'
-
-        # Fodder by price tier
-        if current_price >= 20000:
-            return '89+ Fodder'
-        elif current_price >= 5000:
-            return '87-88 Fodder'
-        elif current_price >= 1000:
-            return '86 Fodder'
-        else:
-            return '85 Fodder'
+    @property
+    def scraper(self) -> FutbinScraper:
+        """Futbin scraper, created lazily and shared by all pulse workers."""
+        if self._scraper is None:
+            with self._scraper_lock:
+                if self._scraper is None:
+                    self._scraper = FutbinScraper(platform=self.platform)
+        return self._scraper
+    
+    @staticmethod
+    def _categorize_players(players: List[dict], stats: List[dict]) -> List[str]:
+        """
+        Determine each player's category, preferring stored card_type from
+        enrichment and falling back to vectorized ID/price heuristics.
+        """
+        # Fallback: ID-based heuristics for un-enriched players, then fodder
+        # by price tier (first matching condition wins)
+        ids = np.fromiter((p.get('futbin_id', 0) for p in players), dtype=np.int64, count=len(players))
+        highs = np.fromiter((s['all_time_high'] for s in stats), dtype=np.float64, count=len(stats))
+        prices = np.fromiter((s['current'] for s in stats), dtype=np.float64, count=len(stats))
+        
+        fallback = np.select(
+            [
+                (ids >= 18699) & (ids <= 21500) & (highs >= 200000),
+                (ids >= 18800) & (ids <= 18900),
+                (ids >= 21760) & (ids <= 21780) & (highs >= 500000),
+                (ids >= 20000) & (ids <= 22500) & (prices >= 10000) & (prices <= 50000),
+                prices >= 20000,
+                prices >= 5000,
+                prices >= 1000,
+            ],
+            ['Icons', 'Heroes', 'TOTY', 'TOTW', '89+ Fodder', '87-88 Fodder', '86 Fodder'],
+            default='85 Fodder'
+        )
+        
+        # GOLD_RARE, SILVER, BRONZE, OTHER fall through to the fallback
+        return [
+            _CATEGORY_MAP.get(p.get('card_type')) or str(cat)
+            for p, cat in zip(players, fallback)
+        ]
+    
+    @staticmethod
+    def _range_metrics(stats: List[dict]) -> Tuple[float, float, float, float, float]:
+        """
+        Average position and the % of players at lows/highs and trending
+        down/up, reduced in one pass over the stats.
+        
+        Returns (avg_position, pct_at_lows, pct_at_highs, pct_trending_down,
+        pct_trending_up).
+        """
+        positions = np.fromiter((s['position_in_range'] for s in stats), dtype=np.float64, count=len(stats))
+        changes = np.fromiter((s['pct_change_24h'] for s in stats), dtype=np.float64, count=len(stats))
+        
+        return tuple(float(v) for v in _reduce_pulse(positions, changes))
     
     def _calculate_category_pulse(self, stats: List[dict], name: str) -> CategoryPulse:
         """Calculate pulse metrics for a category."""
         if not stats:
-            return CategoryPulse(
-                name=name, count=0, avg_position=50,
-                pct_at_lows=0, pct_at_highs=0,
-                pct_trending_down=0, pct_trending_up=0,
-                status='NORMAL'
-            )
+            return CategoryPulse.empty(name)
         
-        positions = [s['position_in_range'] for s in stats]
-        changes = [s['pct_change_24h'] for s in stats]
-        
-        avg_position = sum(positions) / len(positions)
-        pct_at_lows = sum(1 for p in positions if p <= 25) / len(positions) * 100
-        pct_at_highs = sum(1 for p in positions if p >= 75) / len(positions) * 100
-        pct_trending_down = sum(1 for c in changes if c < -2) / len(changes) * 100
-        pct_trending_up = sum(1 for c in changes if c > 2) / len(changes) * 100
-        
-        # Determine status
-        if avg_position <= 20 or pct_at_lows >= 60:
-            status = 'CRASHED'
-        elif avg_position <= 35:
-            status = 'LOW'
-        elif avg_position >= 75 or pct_at_highs >= 50:
-            status = 'INFLATED'
-        elif avg_position >= 60:
-            status = 'HIGH'
-        else:
-            status = 'NORMAL'
+        return CategoryPulse.from_metrics(name, len(stats), *self._range_metrics(stats))
+    
+    def _collect_one(self, p: dict, history: List[dict]) -> Optional[Tuple[dict, dict]]:
+        """Gather pulse stats for one player; returns (player, stat) or None."""
+        # Skip players recently seen with too little history to analyze
+        flagged_at = self._insufficient_history.get(p['futbin_id'])
+        if flagged_at and datetime.now() - flagged_at < timedelta(seconds=INSUFFICIENT_HISTORY_TTL):
+            return None
         
-        return CategoryPulse(
-            name=name,
-            count=len(stats),
-            avg_position=avg_position,
-            pct_at_lows=pct_at_lows,
-            pct_at_highs=pct_at_highs,
-            pct_trending_down=pct_trending_down,
-            pct_trending_up=pct_trending_up,
-            status=status
-        )
+        try:
+            # Get long-term data
+            longterm = self.scraper.get_longterm_daily_prices(
+                p['futbin_id'], 
+                p.get('slug', p['name'].lower().replace(' ', '-'))
+            )
+            
+            if not longterm:
+                return None
+            if longterm['data_points'] < 10:
+                self._insufficient_history[p['futbin_id']] = datetime.now()
+                return None
+            self._insufficient_history.pop(p['futbin_id'], None)
+            
+            # Calculate 24h change from our recent DB prices
+            pct_change_24h = 0
+            if len(history) >= 2:
+                current = history[0]['price']
+                older = history[-1]['price']
+                pct_change_24h = ((current - older) / older * 100) if older else 0
+            
+            stat = {
+                'name': p['name'],
+                'futbin_id': p['futbin_id'],
+                'position_in_range': longterm['position_in_range'],
+                'current': longterm['current'],
+                'all_time_low': longterm['all_time_low'],
+                'all_time_high': longterm['all_time_high'],
+                'pct_change_24h': pct_change_24h,
+                'volatility': longterm['volatility_pct']
+            }
+            return p, stat
+                
+        except Exception as e:
+            logger.warning(f"Could not analyze {p['name']}: {e}")
+            return None
     
     def get_pulse(self, fetch_fresh: bool = False) -> Optional[MarketPulse]:
         """
@@ -176,96 +359,92 @@ class MarketPulseAnalyzer:
         
         Args:
             fetch_fresh: If True, scrape fresh data from Futbin for each player.
-                        If False, use cached long-term data (faster but may be stale).
+                        If False, use cached long-term data (faster but may be stale),
+                        and reuse the last pulse if it is younger than cache_ttl.
         
         Returns:
             MarketPulse object with current market status
         """
+        now = datetime.now()
+        if not fetch_fresh and self._cached and now - self._cached[0] < timedelta(seconds=self.cache_ttl):
+            return self._cached[1]
+        
+        pulse = self._compute_pulse()
+        if pulse is not None:
+            self._cached = (now, pulse)
+        return pulse
+    
+    def _compute_pulse(self) -> Optional[MarketPulse]:
+        """Analyze all tracked players and build a MarketPulse."""
         players = self.db.get_all_players()
         
         if len(players) < 3:
             logger.warning("Need at least 3 tracked players for market pulse")
             return None
         
-        # Collect data for each player, organized by category
-        all_stats = []
-        category_stats: Dict[str, List[dict]] = {}
+        # Recent DB prices for every player in one query
+        histories = self.db.get_price_histories_bulk(
+            [p['id'] for p in players], platform=self.platform, days=2, limit=50
+        )
         
-        for p in players:
-            try:
-                # Get long-term data
-                longterm = self.scraper.get_longterm_daily_prices(
-                    p['futbin_id'], 
-                    p.get('slug', p['name'].lower().replace(' ', '-'))
-                )
-                
-                if not longterm or longterm['data_points'] < 10:
+        # Collect data for each player. Lookups are I/O-bound, so they run on
+        # a thread pool; results are merged here in player order, accumulating
+        # the overall metrics as they arrive.
+        analyzed: List[dict] = []
+        all_stats: List[dict] = []
+        total = 0
+        sum_pos = 0
+        n_lows = n_highs = n_down = n_up = 0
+        
+        with ThreadPoolExecutor(max_workers=min(PULSE_MAX_WORKERS, len(players))) as pool:
+            for collected in pool.map(self._collect_one, players, [histories[p['id']] for p in players]):
+                if collected is None:
                     continue
-                
-                # Get recent price changes from our DB
-                history = self.db.get_price_history(p['id'], platform=self.platform, days=2, limit=50)
-                
-                # Calculate 24h change
-                pct_change_24h = 0
-                if len(history) >= 2:
-                    current = history[0]['price']
-                    older = history[-1]['price']
-                    pct_change_24h = ((current - older) / older * 100) if older else 0
-                
-                stat = {
-                    'name': p['name'],
-                    'futbin_id': p['futbin_id'],
-                    'position_in_range': longterm['position_in_range'],
-                    'current': longterm['current'],
-                    'all_time_low': longterm['all_time_low'],
-                    'all_time_high': longterm['all_time_high'],
-                    'pct_change_24h': pct_change_24h,
-                    'volatility': longterm['volatility_pct']
-                }
-                
+                player, stat = collected
+                analyzed.append(player)
                 all_stats.append(stat)
                 
-                # Categorize player
-                category = self._categorize_player(p, longterm['current'], longterm['all_time_high'])
-                if category not in category_stats:
-                    category_stats[category] = []
-                category_stats[category].append(stat)
-                    
-            except Exception as e:
-                logger.warning(f"Could not analyze {p['name']}: {e}")
-                continue
-        
-        if len(all_stats) < 3:
+                position = stat['position_in_range']
+                change = stat['pct_change_24h']
+                total += 1
+                sum_pos += position
+                n_lows += position <= 25
+                n_highs += position >= 75
+                n_down += change < -2
+                n_up += change > 2
+        
+        if total < 3:
             logger.warning("Not enough valid player data for market pulse")
             return None
         
-        # Calculate overall metrics
-        positions = [s['position_in_range'] for s in all_stats]
-        changes = [s['pct_change_24h'] for s in all_stats]
+        # Organize stats by category
+        category_stats: Dict[str, List[dict]] = {}
+        for category, stat in zip(self._categorize_players(analyzed, all_stats), all_stats):
+            category_stats.setdefault(category, []).append(stat)
         
-        avg_position = sum(positions) / len(positions)
-        pct_at_lows = sum(1 for p in positions if p <= 25) / len(positions) * 100
-        pct_at_highs = sum(1 for p in positions if p >= 75) / len(positions) * 100
-        pct_trending_down = sum(1 for c in changes if c < -2) / len(changes) * 100
-        pct_trending_up = sum(1 for c in changes if c > 2) / len(changes) * 100
+        # Calculate overall metrics
+        avg_position = sum_pos / total
+        pct_at_lows = n_lows / total * 100
+        pct_at_highs = n_highs / total * 100
+        pct_trending_down = n_down / total * 100
+        pct_trending_up = n_up / total * 100
         
         # Calculate category pulses
         categories = {}
         for cat_name, cat_stats in category_stats.items():
             categories[cat_name] = self._calculate_category_pulse(cat_stats, cat_name)
         
-        # Get combined fodder pulse
-        fodder_stats = []
-        for cat_name in ['85 Fodder', '86 Fodder', '87-88 Fodder', '89+ Fodder']:
-            if cat_name in category_stats:
-                fodder_stats.extend(category_stats[cat_name])
-        
-        fodder_pulse = self._calculate_category_pulse(fodder_stats, 'All Fodder')
+        # Get combined fodder pulse from the fodder tiers' pulses
+        fodder_pulse = CategoryPulse.merge('All Fodder', (
+            categories[cat_name]
+            for cat_name in ['85 Fodder', '86 Fodder', '87-88 Fodder', '89+ Fodder']
+            if cat_name in categories
+        ))
         fodder_status = fodder_pulse.status
         fodder_avg_position = fodder_pulse.avg_position
         
         # Determine overall status
-        status, health_score, summary = self._determine_status(
+        status, health_score = self._determine_status(
             avg_position, pct_at_lows, pct_at_highs, 
             pct_trending_down, pct_trending_up, fodder_avg_position
         )
@@ -286,10 +465,9 @@ class MarketPulseAnalyzer:
             categories=categories,
             fodder_status=fodder_status,
             fodder_avg_position=fodder_avg_position,
-            summary=summary,
             buy_sentiment=buy_sentiment,
             sell_sentiment=sell_sentiment,
-            players_analyzed=len(all_stats),
+            players_analyzed=total,
             timestamp=datetime.now()
         )
     
@@ -301,40 +479,35 @@ class MarketPulseAnalyzer:
         pct_trending_down: float,
         pct_trending_up: float,
         fodder_position: float
-    ) -> Tuple[str, int, str]:
-        """Determine overall market status from metrics."""
+    ) -> Tuple[str, int]:
+        """Determine overall market status and health score from metrics."""
         
         # CRASHED: Most players near their lows
         if pct_at_lows >= 50 or avg_position <= 25:
             status = "CRASHED"
             health_score = int(avg_position)
-            summary = f"🟢 MARKET CRASHED - {pct_at_lows:.0f}% of players near all-time lows. BUY WINDOW!"
         
         # CRASHING: Active downtrend
         elif pct_trending_down >= 60 and avg_position > 30:
             status = "CRASHING"
             health_score = int(avg_position * 0.8)
-            summary = f"🔻 MARKET CRASHING - {pct_trending_down:.0f}% trending down. Wait for floor."
         
         # INFLATED: Most players near highs
         elif pct_at_highs >= 40 or avg_position >= 70:
             status = "INFLATED"
             health_score = int(100 - (avg_position - 50))
-            summary = f"🔴 MARKET INFLATED - {pct_at_highs:.0f}% near all-time highs. Risky to buy."
         
         # RECOVERING: Coming up from lows
         elif avg_position <= 40 and pct_trending_up >= 40:
             status = "RECOVERING"
             health_score = int(avg_position + 20)
-            summary = f"📈 MARKET RECOVERING - {pct_trending_up:.0f}% trending up from lows."
         
         # STABLE: Normal conditions
         else:
             status = "STABLE"
             health_score = 50
-            summary = f"➖ MARKET STABLE - Average position {avg_position:.0f}%. Normal conditions."
         
-        return status, health_score, summary
+        return status, health_score
     
     def _determine_sentiment(
         self,
@@ -364,12 +537,13 @@ class MarketPulseAnalyzer:
         return buy_sentiment, sell_sentiment
 
 
-# Singleton
-_pulse_analyzer = None
+# One analyzer per platform, so switching platforms keeps each one's
+# scraper and cached pulse
+_pulse_analyzers: Dict[str, MarketPulseAnalyzer] = {}
 
 def get_pulse_analyzer(platform: str = 'ps') -> MarketPulseAnalyzer:
-    """Get the market pulse analyzer singleton."""
-    global _pulse_analyzer
-    if _pulse_analyzer is None or _pulse_analyzer.platform != platform:
-        _pulse_analyzer = MarketPulseAnalyzer(platform=platform)
-    return _pulse_analyzer
+    """Get the market pulse analyzer for a platform."""
+    analyzer = _pulse_analyzers.get(platform)
+    if analyzer is None:
+        analyzer = _pulse_analyzers[platform] = MarketPulseAnalyzer(platform=platform)
+    return analyzer
@@ -4,18 +4,60 @@ Phased approach: metadata enrichment -> return labeling -> baselines -> ML evalu
 """
 
 import logging
-import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict, defaultdict
+from itertools import islice, repeat
 
+import numpy as np
 from pymongo import ASCENDING, DESCENDING
 
-from .database import get_db, Database
+from .database import get_db, Database, player_oid, PLAYER_SUMMARY_FIELDS, PRICE_HISTORY_INDEX
 from .scraper import FutbinScraper
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent player enrichments; Futbin requests are still
+# spaced by the scraper's shared rate limiter
+ENRICH_MAX_WORKERS = 8
+
+# Labeled signals buffered per insert_many in label_signals
+LABEL_BATCH_SIZE = 500
+
+# signal_log documents streamed and labeled per chunk in label_signals
+SIGNAL_CHUNK_SIZE = 1000
+
+# Concurrent price_history window queries per labeling chunk
+PREFETCH_MAX_WORKERS = 8
+
+# signal_log fields consumed by label_signals
+SIGNAL_LABEL_FIELDS = {
+    'timestamp': 1, 'price': 1, 'player_id': 1, 'platform': 1, 'direction': 1,
+    'final_score': 1, 'raw_score': 1, 'components': 1, 'velocity_state': 1,
+    'buy_readiness': 1, 'market_state': 1, 'signal_type': 1,
+}
+
+# Feature matrix columns for ML evaluation: numeric features as-is, then the
+# ordinal encoded categoricals
+NUMERIC_FEATURES = [
+    'final_score', 'raw_score', 'comp_market', 'comp_timing', 'comp_position',
+    'comp_bounce', 'log_price', 'days_since_release',
+]
+CATEGORICAL_FEATURES = ['velocity_state', 'buy_readiness', 'market_state', 'card_type']
+
+# longterm_cache price lists kept per pipeline, least recently used evicted first
+LONGTERM_CACHE_SIZE = 5000
+
+# players fields used when labeling signals and building features
+PLAYER_LABEL_FIELDS = {
+    'futbin_id': 1, 'name': 1, 'card_type': 1, 'first_seen_at': 1, 'created_at': 1,
+}
+
+# How far from a T+Nd target a price_history record may be to count as its price
+PRICE_MATCH_WINDOW = timedelta(hours=6)
+
 
 class MLPipeline:
     """Manages the practical ML path for signal improvement."""
@@ -24,6 +66,12 @@ class MLPipeline:
         self.db = db or get_db()
         self.platform = platform
         self.scraper = FutbinScraper(platform=platform)
+        # player_id (as stored on signals) -> player doc, reset per label_signals run
+        self._player_cache: Dict[object, Optional[dict]] = {}
+        # longterm_cache key -> daily [ts_ms, price] points (None if absent)
+        self._longterm_cache: 'OrderedDict[str, Optional[list]]' = OrderedDict()
+        # Feature matrix column names, set by _build_feature_matrix
+        self._feature_cols: List[str] = []
 
     # ========== STEP 1: Card Metadata Enrichment ==========
 
@@ -60,7 +108,7 @@ class MLPipeline:
         source = 'import' if existing_card_type else None
 
         if not card_type:
-            metadata = self.scraper.get_player_metadata(futbin_id, slug)
+            metadata = self._get_player_metadata(futbin_id, slug)
             if metadata and metadata.get('card_type'):
                 card_type = metadata['card_type']
                 version_raw = metadata.get('version_raw')
@@ -91,28 +139,51 @@ class MLPipeline:
             'skipped': False,
         }
 
+    def _get_player_metadata(self, futbin_id: int, slug: str) -> Optional[Dict]:
+        """
+        Scraped card metadata for a player, served from metadata_cache when a
+        previous run already fetched it (entries expire after 30 days).
+        """
+        cached = self.db.db.metadata_cache.find_one({'futbin_id': futbin_id}, {'data': 1})
+        if cached:
+            return cached['data']
+
+        metadata = self.scraper.get_player_metadata(futbin_id, slug)
+        # Only successful scrapes are cached so failures are retried next run
+        if metadata:
+            self.db.db.metadata_cache.update_one(
+                {'futbin_id': futbin_id},
+                {'$set': {'futbin_id': futbin_id, 'data': metadata, 'cached_at': datetime.now()}},
+                upsert=True,
+            )
+        return metadata
+
     def enrich_all_players(self, force: bool = False) -> List[Dict]:
         """Backfill card_type + first_seen_at for all active players."""
-        players = self.db.get_active_players()
+        players = self.db.get_active_players(PLAYER_SUMMARY_FIELDS)
         results = []
 
-        for i, player in enumerate(players):
-            futbin_id = player['futbin_id']
-            slug = player.get('slug') or player.get('name', '').lower().replace(' ', '-')
+        # Enrichment is dominated by Futbin/DB round-trips, so players are
+        # processed on a thread pool; the scraper's shared rate limiter keeps
+        # requests to Futbin spaced out. Results come back in player order.
+        with ThreadPoolExecutor(max_workers=max(1, min(ENRICH_MAX_WORKERS, len(players)))) as pool:
+            for i, result in enumerate(pool.map(self._enrich_one, players, repeat(force))):
+                results.append(result)
 
-            result = self.enrich_player(futbin_id, slug, force=force)
-            result['name'] = player.get('name', 'Unknown')
-            result['futbin_id'] = futbin_id
-            results.append(result)
+                if (i + 1) % 10 == 0:
+                    logger.info(f"Enriched {i + 1}/{len(players)} players...")
 
-            # Delay between scrape requests (only if we actually scraped)
-            if result.get('source') == 'scraped':
-                time.sleep(1)
+        return results
 
-            if (i + 1) % 10 == 0:
-                logger.info(f"Enriched {i + 1}/{len(players)} players...")
+    def _enrich_one(self, player: dict, force: bool) -> Dict:
+        """Enrich one player summary and tag the result with its name/futbin_id."""
+        futbin_id = player['futbin_id']
+        slug = player.get('slug') or player.get('name', '').lower().replace(' ', '-')
 
-        return results
+        result = self.enrich_player(futbin_id, slug, force=force)
+        result['name'] = player.get('name', 'Unknown')
+        result['futbin_id'] = futbin_id
+        return result
 
     def _derive_first_seen_at(self, futbin_id: int, player: dict) -> Optional[datetime]:
         """Derive first_seen_at from longterm price data or created_at."""
@@ -130,6 +201,9 @@ class MLPipeline:
                 first_seen = datetime.utcfromtimestamp(first_ts_ms / 1000)
         except Exception as e:
             logger.debug(f"Could not fetch longterm data for {slug}: {e}")
+        finally:
+            # The scraper may have refreshed the cached doc
+            self._longterm_cache.pop(f"{futbin_id}_{self.platform}", None)
 
         # Fall back to created_at
         created_at = player.get('created_at')
@@ -154,63 +228,115 @@ class MLPipeline:
         }
 
         cutoff = datetime.now() - timedelta(days=min_age_days)
+        self._player_cache = {}
+
+        # Stream candidate signals in chunks instead of loading them all
+        cursor = self.db.db.signal_log.find(
+            {'timestamp': {'$lte': cutoff}}, SIGNAL_LABEL_FIELDS
+        ).sort('timestamp', ASCENDING).batch_size(SIGNAL_CHUNK_SIZE)
+
+        # Longterm cache prices, loaded once per player for the run
+        longterm_series: Dict[int, Optional[Tuple[list, list]]] = {}
+        buffer = []
+
+        while True:
+            signals = list(islice(cursor, SIGNAL_CHUNK_SIZE))
+            if not signals:
+                break
+
+            # Already-labeled signal ids in this chunk (signal_id is indexed)
+            existing = {
+                d['signal_id'] for d in self.db.db.labeled_signals.find(
+                    {'signal_id': {'$in': [s['_id'] for s in signals]}},
+                    {'_id': 0, 'signal_id': 1}
+                )
+            }
 
-        signals = list(self.db.db.signal_log.find({
-            'timestamp': {'$lte': cutoff}
-        }))
+            pending = []
+            for signal in signals:
+                if signal['_id'] in existing:
+                    stats['already_labeled'] += 1
+                elif not signal.get('price') or not signal.get('player_id'):
+                    stats['skipped_no_price'] += 1
+                else:
+                    pending.append(signal)
+
+            # Players for the chunk, resolved together
+            self._preload_players(s['player_id'] for s in pending)
+
+            # Price history around the pending signals' T+2d/T+7d targets,
+            # one query per player
+            price_windows = self._prefetch_price_windows(pending, (2, 7))
+
+            # Outcome prices per signal; returns/outcomes are then computed
+            # for the whole chunk at once
+            priced = []
+            for signal in pending:
+                price_2d, price_7d = self._outcome_prices(
+                    signal, price_windows.get(signal['player_id']), longterm_series
+                )
+                if price_2d is None and price_7d is None:
+                    stats['skipped_no_price'] += 1
+                    continue
+                priced.append((signal, price_2d, price_7d))
 
-        for signal in signals:
-            signal_id = signal['_id']
+            for labeled_doc in self._labeled_docs(priced):
+                buffer.append(labeled_doc)
+                stats['labeled'] += 1
+                if len(buffer) >= LABEL_BATCH_SIZE:
+                    self.db.db.labeled_signals.insert_many(buffer, ordered=False)
+                    buffer.clear()
 
-            # Skip if already labeled
-            if self.db.db.labeled_signals.find_one({'signal_id': signal_id}):
-                stats['already_labeled'] += 1
-                continue
+        if buffer:
+            self.db.db.labeled_signals.insert_many(buffer, ordered=False)
 
-            signal_ts = signal.get('timestamp')
-            signal_price = signal.get('price', 0)
-            player_id = signal.get('player_id')
+        return stats
 
-            if not signal_price or not player_id:
-                stats['skipped_no_price'] += 1
-                continue
+    def _outcome_prices(self, signal: Dict, price_window: Optional[Tuple[list, list]],
+                        longterm_series: Dict[int, Optional[Tuple[list, list]]]) -> Tuple[Optional[int], Optional[int]]:
+        """Prices at T+2d and T+7d after a signal (None where not found)."""
+        return tuple(
+            self._find_price_at_offset(signal['player_id'], signal['timestamp'], days=days,
+                                       price_window=price_window, longterm_series=longterm_series)
+            for days in (2, 7)
+        )
 
-            # Find prices at T+2d and T+7d
-            price_2d = self._find_price_at_offset(player_id, signal_ts, days=2)
-            price_7d = self._find_price_at_offset(player_id, signal_ts, days=7)
+    def _labeled_docs(self, priced: List[Tuple[Dict, Optional[int], Optional[int]]]) -> List[Dict]:
+        """
+        Build labeled docs for (signal, price_2d, price_7d) rows, computing
+        returns and outcomes for all rows at once.
+        """
+        if not priced:
+            return []
 
-            if price_2d is None and price_7d is None:
-                stats['skipped_no_price'] += 1
-                continue
+        signal_prices = np.array([signal['price'] for signal, _, _ in priced], dtype=np.float64)
+
+        def returns(column: int) -> np.ndarray:
+            # Missing (or zero) outcome prices have no return
+            prices = np.array([row[column] or np.nan for row in priced], dtype=np.float64)
+            return (prices - signal_prices) / signal_prices * 100
+
+        returns_2d, returns_7d = returns(1), returns(2)
+        outcomes_2d, outcomes_7d = self._classify_outcomes(returns_2d), self._classify_outcomes(returns_7d)
+        labeled_at = datetime.now()
+
+        docs = []
+        for k, (signal, price_2d, price_7d) in enumerate(priced):
+            player_id = signal['player_id']
+            return_2d, return_7d = returns_2d[k], returns_7d[k]
 
             # Get player info for denormalization
-            player = self.db.db.players.find_one({'_id': player_id}) if not isinstance(player_id, str) else None
-            if not player:
-                player = self.db.db.players.find_one({'futbin_id': int(player_id)}) if str(player_id).isdigit() else None
-            if not player:
-                # Try matching by player_id as string _id
-                from bson import ObjectId
-                try:
-                    player = self.db.db.players.find_one({'_id': ObjectId(player_id)})
-                except Exception:
-                    pass
-
-            card_type = player.get('card_type', 'UNKNOWN') if player else 'UNKNOWN'
-            player_name = player.get('name', 'Unknown') if player else 'Unknown'
-
-            # Compute returns
-            return_2d = ((price_2d - signal_price) / signal_price * 100) if price_2d else None
-            return_7d = ((price_7d - signal_price) / signal_price * 100) if price_7d else None
-
-            labeled_doc = {
-                'signal_id': signal_id,
+            player = self._resolve_player(player_id)
+
+            docs.append({
+                'signal_id': signal['_id'],
                 'player_id': player_id,
-                'player_name': player_name,
-                'card_type': card_type,
+                'player_name': player.get('name', 'Unknown') if player else 'Unknown',
+                'card_type': player.get('card_type', 'UNKNOWN') if player else 'UNKNOWN',
                 'platform': signal.get('platform', 'ps'),
                 'direction': signal.get('direction'),
-                'signal_timestamp': signal_ts,
-                'signal_price': signal_price,
+                'signal_timestamp': signal['timestamp'],
+                'signal_price': signal['price'],
                 'final_score': signal.get('final_score'),
                 'raw_score': signal.get('raw_score'),
                 'components': signal.get('components', {}),
@@ -219,67 +345,122 @@ class MLPipeline:
                 'market_state': signal.get('market_state'),
                 'signal_type': signal.get('signal_type'),
                 'price_2d': price_2d,
-                'return_2d_pct': round(return_2d, 2) if return_2d is not None else None,
+                'return_2d_pct': None if np.isnan(return_2d) else round(float(return_2d), 2),
                 'price_7d': price_7d,
-                'return_7d_pct': round(return_7d, 2) if return_7d is not None else None,
-                'outcome_2d': self._classify_outcome(return_2d),
-                'outcome_7d': self._classify_outcome(return_7d),
-                'labeled_at': datetime.now(),
-            }
+                'return_7d_pct': None if np.isnan(return_7d) else round(float(return_7d), 2),
+                'outcome_2d': outcomes_2d[k],
+                'outcome_7d': outcomes_7d[k],
+                'labeled_at': labeled_at,
+            })
+        return docs
 
-            self.db.db.labeled_signals.insert_one(labeled_doc)
-            stats['labeled'] += 1
+    def _prefetch_price_windows(self, signals: Iterable[Dict],
+                                offsets_days: Tuple[int, ...]) -> Dict[object, Tuple[list, list]]:
+        """
+        Load the price_history span covering every signal's T+offset windows,
+        one query per player, with the queries in flight concurrently.
 
-        return stats
+        Returns {player_id: (recorded_at list, price list)}, ascending by time.
+        """
+        first, last = timedelta(days=min(offsets_days)), timedelta(days=max(offsets_days))
+        spans = {}
+        for signal in signals:
+            player_id, signal_ts = signal['player_id'], signal['timestamp']
+            lo = signal_ts + first - PRICE_MATCH_WINDOW
+            hi = signal_ts + last + PRICE_MATCH_WINDOW
+            if player_id in spans:
+                lo = min(lo, spans[player_id][0])
+                hi = max(hi, spans[player_id][1])
+            spans[player_id] = (lo, hi)
+
+        if not spans:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(PREFETCH_MAX_WORKERS, len(spans))) as pool:
+            windows = pool.map(self._load_price_window, spans.keys(), spans.values())
+            return dict(zip(spans.keys(), windows))
+
+    def _load_price_window(self, player_id, span: Tuple[datetime, datetime]) -> Tuple[list, list]:
+        """(recorded_at list, price list) for a player within span, ascending by time."""
+        lo, hi = span
+        cursor = self.db.db.price_history.find(
+            {
+                'player_id': player_oid(player_id),
+                'platform': self.platform,
+                'recorded_at': {'$gte': lo, '$lte': hi},
+            },
+            {'_id': 0, 'recorded_at': 1, 'price': 1}
+        ).sort('recorded_at', ASCENDING).hint(PRICE_HISTORY_INDEX)
+
+        times, prices = [], []
+        for doc in cursor:
+            times.append(doc['recorded_at'])
+            prices.append(doc.get('price'))
+        return times, prices
+
+    def _find_price_at_offset(self, player_id, signal_ts: datetime, days: int,
+                              price_window: Optional[Tuple[list, list]] = None,
+                              longterm_series: Optional[Dict[int, Optional[Tuple[list, list]]]] = None) -> Optional[int]:
+        """
+        Find price approximately 'days' after signal_ts.
 
-    def _find_price_at_offset(self, player_id, signal_ts: datetime,
-                              days: int) -> Optional[int]:
-        """Find price approximately 'days' after signal_ts."""
+        price_window is the player's prefetched (times, prices) from
+        _prefetch_price_windows; without it price_history is queried directly.
+        longterm_series memoizes the longterm cache's time-sorted
+        (timestamps, prices) by futbin_id.
+        """
         target_ts = signal_ts + timedelta(days=days)
-        window = timedelta(hours=6)
-
-        # Try price_history first (more precise)
-        price_record = self.db.db.price_history.find_one({
-            'player_id': player_id,
-            'platform': self.platform,
-            'recorded_at': {
-                '$gte': target_ts - window,
-                '$lte': target_ts + window,
-            }
-        }, sort=[('recorded_at', ASCENDING)])
+        window = PRICE_MATCH_WINDOW
 
-        if price_record and price_record.get('price'):
-            return price_record['price']
+        # Try price_history first (more precise): earliest record in the window
+        if price_window is not None:
+            times, prices = price_window
+            i = bisect_left(times, target_ts - window)
+            price = prices[i] if i < len(times) and times[i] <= target_ts + window else None
+        else:
+            price_record = self.db.db.price_history.find_one({
+                'player_id': player_oid(player_id),
+                'platform': self.platform,
+                'recorded_at': {
+                    '$gte': target_ts - window,
+                    '$lte': target_ts + window,
+                }
+            }, sort=[('recorded_at', ASCENDING)])
+            price = price_record.get('price') if price_record else None
+
+        if price:
+            return price
 
         # Fallback: longterm_cache daily data
         # Need to resolve player_id -> futbin_id
-        player = None
-        if isinstance(player_id, str) and player_id.isdigit():
-            player = self.db.db.players.find_one({'futbin_id': int(player_id)})
-        if not player:
-            from bson import ObjectId
-            try:
-                player = self.db.db.players.find_one({'_id': ObjectId(player_id)})
-            except Exception:
-                pass
-
+        player = self._resolve_player(player_id)
         if not player:
             return None
 
-        cache_key = f"{player['futbin_id']}_{self.platform}"
-        cached = self.db.db.longterm_cache.find_one({'cache_key': cache_key})
-
-        if cached and cached.get('data') and cached['data'].get('prices'):
+        futbin_id = player['futbin_id']
+        if longterm_series is not None and futbin_id in longterm_series:
+            series = longterm_series[futbin_id]
+        else:
+            prices = self._get_longterm(f"{futbin_id}_{self.platform}")
+            series = None
+            if prices:
+                # Sorted once per player so each lookup is a bisect
+                ordered = sorted(prices, key=lambda point: point[0])
+                series = ([ts_ms for ts_ms, _ in ordered], [price for _, price in ordered])
+            if longterm_series is not None:
+                longterm_series[futbin_id] = series
+
+        if series:
+            timestamps, prices = series
             target_ms = target_ts.timestamp() * 1000
-            prices = cached['data']['prices']
 
-            best_price = None
-            best_diff = float('inf')
-            for ts_ms, price in prices:
-                diff = abs(ts_ms - target_ms)
-                if diff < best_diff:
-                    best_diff = diff
-                    best_price = price
+            # Closest point is one of the two neighbours of the insertion
+            # point; ties go to the earlier one
+            i = bisect_left(timestamps, target_ms)
+            best = min((j for j in (i - 1, i) if 0 <= j < len(timestamps)),
+                       key=lambda j: abs(timestamps[j] - target_ms))
+            best_diff = abs(timestamps[best] - target_ms)
+            best_price = prices[best]
 
             # Accept if within 36 hours (daily data has ~24h gaps)
             if best_diff < 36 * 3600 * 1000:
@@ -287,22 +468,82 @@ class MLPipeline:
 
         return None
 
+    def _get_longterm(self, cache_key: str) -> Optional[list]:
+        """longterm_cache daily prices for cache_key through a small LRU cache."""
+        if cache_key in self._longterm_cache:
+            self._longterm_cache.move_to_end(cache_key)
+            return self._longterm_cache[cache_key]
+
+        cached = self.db.db.longterm_cache.find_one({'cache_key': cache_key}, {'data.prices': 1})
+        prices = cached['data']['prices'] if cached and cached.get('data') and cached['data'].get('prices') else None
+
+        self._longterm_cache[cache_key] = prices
+        if len(self._longterm_cache) > LONGTERM_CACHE_SIZE:
+            self._longterm_cache.popitem(last=False)
+        return prices
+
+    def _resolve_player(self, player_id) -> Optional[dict]:
+        """
+        Look up the player a signal refers to, memoized per labeling run.
+
+        Signals store player_id as an ObjectId, its string form, or a futbin_id.
+        """
+        if player_id not in self._player_cache:
+            self._preload_players([player_id])
+        return self._player_cache[player_id]
+
+    def _preload_players(self, player_ids: Iterable) -> None:
+        """
+        Resolve every not-yet-cached player_id into self._player_cache with
+        one $in query per id form instead of a find_one cascade per id.
+
+        Resolution order per id matches the lookup cascade: _id as stored,
+        then futbin_id for numeric ids, then _id as a parsed ObjectId.
+        """
+        from bson import ObjectId
+
+        todo = {pid for pid in player_ids if pid not in self._player_cache}
+        if not todo:
+            return
+
+        by_oid_candidates = set()
+        futbin_ids = set()
+        for pid in todo:
+            if not isinstance(pid, str):
+                by_oid_candidates.add(pid)
+            if str(pid).isdigit():
+                futbin_ids.add(int(pid))
+            if isinstance(pid, ObjectId) or ObjectId.is_valid(pid):
+                by_oid_candidates.add(ObjectId(pid))
+
+        by_oid = {
+            p['_id']: p for p in self.db.db.players.find(
+                {'_id': {'$in': list(by_oid_candidates)}}, PLAYER_LABEL_FIELDS
+            )
+        } if by_oid_candidates else {}
+        by_fid = {
+            p['futbin_id']: p for p in self.db.db.players.find(
+                {'futbin_id': {'$in': list(futbin_ids)}}, PLAYER_LABEL_FIELDS
+            )
+        } if futbin_ids else {}
+
+        for pid in todo:
+            player = by_oid.get(pid) if not isinstance(pid, str) else None
+            if not player and str(pid).isdigit():
+                player = by_fid.get(int(pid))
+            if not player and (isinstance(pid, ObjectId) or ObjectId.is_valid(pid)):
+                player = by_oid.get(ObjectId(pid))
+            self._player_cache[pid] = player
+
     @staticmethod
-    def _classify_outcome(return_pct: Optional[float]) -> Optional[str]:
-        if return_pct is None:
-            return None
-        if return_pct > 2:
-            return 'WIN'
-        if return_pct < -2:
-            return 'LOSS'
-        return 'FLAT'
+    def _classify_outcomes(returns: np.ndarray) -> List[Optional[str]]:
+        """WIN above +2%, LOSS below -2%, else FLAT; None where the return is NaN."""
+        labels = np.select([returns > 2, returns < -2], ['WIN', 'LOSS'], default='FLAT').astype(object)
+        labels[np.isnan(returns)] = None
+        return labels.tolist()
 
     def get_label_stats(self) -> Dict:
         """Get statistics about labeled data."""
-        total = self.db.db.labeled_signals.count_documents({})
-        if total == 0:
-            return {'total': 0}
-
         pipeline = [
             {'$group': {
                 '_id': {'direction': '$direction', 'card_type': '$card_type'},
@@ -313,6 +554,12 @@ class MLPipeline:
         ]
         groups = list(self.db.db.labeled_signals.aggregate(pipeline))
 
+        # The groups partition the collection, so their counts give the total
+        # without a separate count over labeled_signals
+        total = sum(g['count'] for g in groups)
+        if total == 0:
+            return {'total': 0}
+
         by_direction = defaultdict(int)
         by_card_type = defaultdict(lambda: {'count': 0, 'avg_return_7d': None})
         for g in groups:
@@ -344,42 +591,72 @@ class MLPipeline:
             (75, 100, 'STRONG BUY (75-100)'),
         ]
 
-        labeled = list(self.db.db.labeled_signals.find({
-            'direction': direction,
-            'return_7d_pct': {'$ne': None},
-        }))
+        # One row per (card_type, score range) with the sums/counts the stats
+        # need, reduced server-side; signals outside every range get range None
+        score = {'$ifNull': ['$final_score', 0]}
+        has_2d = {'$ne': [{'$ifNull': ['$return_2d_pct', None]}, None]}
+        has_7d = {'$ne': [{'$ifNull': ['$return_7d_pct', None]}, None]}
 
-        by_type = defaultdict(list)
-        for sig in labeled:
-            by_type[sig.get('card_type', 'UNKNOWN')].append(sig)
+        def count_if(cond):
+            return {'$sum': {'$cond': [cond, 1, 0]}}
+
+        rows = self.db.db.labeled_signals.aggregate([
+            {'$match': {
+                'direction': direction,
+                'return_7d_pct': {'$ne': None},
+            }},
+            {'$group': {
+                '_id': {
+                    'card_type': {'$ifNull': ['$card_type', 'UNKNOWN']},
+                    'range': {'$switch': {
+                        'branches': [
+                            {'case': {'$and': [{'$gte': [score, lo]}, {'$lte': [score, hi]}]}, 'then': label}
+                            for lo, hi, label in score_ranges
+                        ],
+                        'default': None,
+                    }},
+                },
+                'n': {'$sum': 1},
+                'sum_score': {'$sum': score},
+                'n_2d': count_if(has_2d),
+                'sum_2d': {'$sum': '$return_2d_pct'},
+                'hits_2d': count_if({'$and': [has_2d, {'$gt': ['$return_2d_pct', 0]}]}),
+                'n_7d': count_if(has_7d),
+                'sum_7d': {'$sum': '$return_7d_pct'},
+                'hits_7d': count_if({'$and': [has_7d, {'$gt': ['$return_7d_pct', 0]}]}),
+                'wins_7d': count_if({'$and': [has_7d, {'$gt': ['$return_7d_pct', 2]}]}),
+            }},
+        ])
+
+        by_type = defaultdict(dict)
+        for row in rows:
+            by_type[row['_id']['card_type']][row['_id']['range']] = row
 
         baselines = {}
-        for card_type, signals in sorted(by_type.items()):
+        for card_type, ranges in sorted(by_type.items()):
             type_baselines = []
 
             for lo, hi, range_label in score_ranges:
-                range_signals = [s for s in signals if lo <= (s.get('final_score') or 0) <= hi]
+                row = ranges.get(range_label)
 
-                if not range_signals:
+                if not row:
                     type_baselines.append({'range': range_label, 'n': 0})
                     continue
 
-                returns_2d = [s['return_2d_pct'] for s in range_signals if s.get('return_2d_pct') is not None]
-                returns_7d = [s['return_7d_pct'] for s in range_signals if s.get('return_7d_pct') is not None]
-
+                n_2d, n_7d = row['n_2d'], row['n_7d']
                 type_baselines.append({
                     'range': range_label,
-                    'n': len(range_signals),
-                    'avg_return_2d': sum(returns_2d) / len(returns_2d) if returns_2d else None,
-                    'avg_return_7d': sum(returns_7d) / len(returns_7d) if returns_7d else None,
-                    'hit_rate_2d': sum(1 for r in returns_2d if r > 0) / len(returns_2d) * 100 if returns_2d else None,
-                    'hit_rate_7d': sum(1 for r in returns_7d if r > 0) / len(returns_7d) * 100 if returns_7d else None,
-                    'win_rate_7d': sum(1 for r in returns_7d if r > 2) / len(returns_7d) * 100 if returns_7d else None,
-                    'avg_score': sum(s.get('final_score', 0) for s in range_signals) / len(range_signals),
+                    'n': row['n'],
+                    'avg_return_2d': row['sum_2d'] / n_2d if n_2d else None,
+                    'avg_return_7d': row['sum_7d'] / n_7d if n_7d else None,
+                    'hit_rate_2d': row['hits_2d'] / n_2d * 100 if n_2d else None,
+                    'hit_rate_7d': row['hits_7d'] / n_7d * 100 if n_7d else None,
+                    'win_rate_7d': row['wins_7d'] / n_7d * 100 if n_7d else None,
+                    'avg_score': row['sum_score'] / row['n'],
                 })
 
             baselines[card_type] = {
-                'total_signals': len(signals),
+                'total_signals': sum(row['n'] for row in ranges.values()),
                 'by_score_range': type_baselines,
             }
 
@@ -401,23 +678,17 @@ class MLPipeline:
             card_type = player.get('card_type', 'UNKNOWN')
             first_seen = player['first_seen_at']
 
-            cache_key = f"{player['futbin_id']}_{self.platform}"
-            cached = self.db.db.longterm_cache.find_one({'cache_key': cache_key})
-
-            if not cached or not cached.get('data') or not cached['data'].get('prices'):
-                continue
-
-            prices = cached['data']['prices']
-            if len(prices) < 10:
+            prices = self._get_longterm(f"{player['futbin_id']}_{self.platform}")
+            if not prices or len(prices) < 10:
                 continue
 
-            price_values = [p[1] for p in prices]
-            first_price = price_values[0]
+            first_price = prices[0][1]
             if first_price <= 0:
                 continue
 
-            min_price = min(price_values)
-            min_idx = price_values.index(min_price)
+            # First occurrence of the lowest price
+            min_idx = int(np.asarray(prices)[:, 1].argmin())
+            min_price = prices[min_idx][1]
             min_ts = datetime.fromtimestamp(prices[min_idx][0] / 1000)
 
             days_to_bottom = (min_ts - first_seen).days
@@ -434,15 +705,15 @@ class MLPipeline:
 
         summary = []
         for card_type, entries in sorted(results_by_type.items()):
-            days = sorted([e['days_to_bottom'] for e in entries])
-            drops = [e['drop_pct'] for e in entries]
+            days = np.sort([e['days_to_bottom'] for e in entries])
+            drops = np.array([e['drop_pct'] for e in entries])
 
             summary.append({
                 'card_type': card_type,
                 'sample_size': len(entries),
-                'avg_days_to_bottom': round(sum(days) / len(days), 1),
-                'median_days_to_bottom': days[len(days) // 2],
-                'avg_drop_pct': round(sum(drops) / len(drops), 1),
+                'avg_days_to_bottom': round(float(days.mean()), 1),
+                'median_days_to_bottom': int(days[len(days) // 2]),  # upper median
+                'avg_drop_pct': round(float(drops.mean()), 1),
                 'entries': entries,
             })
 
@@ -454,10 +725,13 @@ class MLPipeline:
         """
         Build feature matrix from labeled BUY signals.
 
-        Returns: (DataFrame X, Series y_return, Series y_class, Series signal_ids)
+        Categoricals are ordinal encoded for the model's native categorical
+        support; the column names are kept on self._feature_cols.
+
+        Returns: (ndarray X, Series y_return, Series y_class, Series signal_ids)
         """
         import pandas as pd
-        import numpy as np
+        from sklearn.preprocessing import OrdinalEncoder
 
         labeled = list(self.db.db.labeled_signals.find({
             'direction': 'BUY',
@@ -467,15 +741,25 @@ class MLPipeline:
         if len(labeled) < 50:
             raise ValueError(f"Need at least 50 labeled BUY signals, have {len(labeled)}")
 
+        # Release dates for signals keyed by futbin_id, in one query
+        futbin_ids = {int(s['player_id']) for s in labeled if str(s.get('player_id', '')).isdigit()}
+        first_seen_by_fid = {
+            p['futbin_id']: p.get('first_seen_at')
+            for p in self.db.db.players.find(
+                {'futbin_id': {'$in': list(futbin_ids)}},
+                {'_id': 0, 'futbin_id': 1, 'first_seen_at': 1}
+            )
+        }
+
         records = []
         for sig in labeled:
             components = sig.get('components', {})
 
             # Calculate days_since_release
             days_since_release = -1
-            player = self.db.db.players.find_one({'futbin_id': int(sig['player_id'])}) if str(sig.get('player_id', '')).isdigit() else None
-            if player and player.get('first_seen_at') and sig.get('signal_timestamp'):
-                days_since_release = (sig['signal_timestamp'] - player['first_seen_at']).days
+            first_seen = first_seen_by_fid.get(int(sig['player_id'])) if str(sig.get('player_id', '')).isdigit() else None
+            if first_seen and sig.get('signal_timestamp'):
+                days_since_release = (sig['signal_timestamp'] - first_seen).days
 
             records.append({
                 'signal_id': sig['signal_id'],
@@ -497,14 +781,17 @@ class MLPipeline:
 
         df = pd.DataFrame(records)
 
-        # One-hot encode categoricals
-        df = pd.get_dummies(df, columns=['velocity_state', 'buy_readiness',
-                                          'market_state', 'card_type'])
+        # Ordinal encode categoricals, one column each. Missing and unseen
+        # values encode as NaN, which the model treats as missing
+        categories = [sorted(df[col].dropna().unique()) for col in CATEGORICAL_FEATURES]
+        encoder = OrdinalEncoder(categories=categories, handle_unknown='use_encoded_value',
+                                 unknown_value=np.nan, dtype=np.float64)
+        categorical = encoder.fit_transform(df[CATEGORICAL_FEATURES].astype(object))
+        numeric = df[NUMERIC_FEATURES].to_numpy(dtype=np.float64)
 
-        feature_cols = [c for c in df.columns if c not in
-                        ['signal_id', 'return_7d', 'outcome_7d']]
+        self._feature_cols = NUMERIC_FEATURES + CATEGORICAL_FEATURES
 
-        X = df[feature_cols].astype(float)
+        X = np.hstack([numeric, categorical])
         y_return = df['return_7d']
         y_class = df['outcome_7d']
 
@@ -517,27 +804,27 @@ class MLPipeline:
         Uses time-based 70/30 train/test split.
         Returns comparison metrics + feature importances + recommendation.
         """
-        from sklearn.ensemble import GradientBoostingRegressor
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        from sklearn.inspection import permutation_importance
         from sklearn.metrics import mean_absolute_error
 
         X, y_return, y_class, signal_ids = self._build_feature_matrix()
 
         # Time-based split
-        split_idx = int(len(X) * 0.7)
+        split_idx = int(X.shape[0] * 0.7)
         X_train, X_test = X[:split_idx], X[split_idx:]
         y_train, y_test = y_return[:split_idx], y_return[split_idx:]
 
-        # Baseline: predict avg return per score bucket
-        def baseline_predict(row):
-            score = row['final_score']
-            return (score - 50) * 0.1
-
-        baseline_preds = X_test.apply(baseline_predict, axis=1)
+        # Baseline: linear in final_score around the neutral 50
+        final_score = X_test[:, self._feature_cols.index('final_score')]
+        baseline_preds = (final_score - 50.0) * 0.1
 
-        # ML model
-        model = GradientBoostingRegressor(
-            n_estimators=100, max_depth=4, learning_rate=0.1,
-            random_state=42,
+        # ML model: histogram-based boosting with the encoded categoricals
+        # handled natively
+        categorical_mask = [col in CATEGORICAL_FEATURES for col in self._feature_cols]
+        model = HistGradientBoostingRegressor(
+            max_iter=100, max_depth=4, learning_rate=0.1,
+            categorical_features=categorical_mask, random_state=42,
         )
         model.fit(X_train, y_train)
         ml_preds = model.predict(X_test)
@@ -546,28 +833,28 @@ class MLPipeline:
         baseline_mae = mean_absolute_error(y_test, baseline_preds)
         ml_mae = mean_absolute_error(y_test, ml_preds)
 
-        baseline_hits = sum(
-            1 for pred, actual in zip(baseline_preds, y_test)
-            if (pred > 0) == (actual > 0)
-        ) / len(y_test) * 100
-
-        ml_hits = sum(
-            1 for pred, actual in zip(ml_preds, y_test)
-            if (pred > 0) == (actual > 0)
-        ) / len(y_test) * 100
-
-        # Feature importances
+        # Direction hit rate: predicted and actual return on the same side of 0
+        actual_up = y_test.to_numpy() > 0
+        baseline_hits = float(((baseline_preds > 0) == actual_up).mean()) * 100
+        ml_hits = float(((ml_preds > 0) == actual_up).mean()) * 100
+
+        # Feature importances: the histogram model has no impurity-based
+        # importances, so use the test MAE increase when a feature is shuffled
+        importances = permutation_importance(
+            model, X_test, y_test, scoring='neg_mean_absolute_error',
+            n_repeats=5, random_state=42,
+        ).importances_mean
         feature_importance = sorted(
-            zip(X.columns, model.feature_importances_),
+            zip(self._feature_cols, importances),
             key=lambda x: x[1], reverse=True,
         )[:10]
 
         improvement = ((baseline_mae - ml_mae) / baseline_mae * 100) if baseline_mae > 0 else 0
 
         return {
-            'sample_size': len(X),
-            'train_size': len(X_train),
-            'test_size': len(X_test),
+            'sample_size': X.shape[0],
+            'train_size': X_train.shape[0],
+            'test_size': X_test.shape[0],
             'baseline_mae': round(baseline_mae, 2),
             'ml_mae': round(ml_mae, 2),
             'improvement_pct': round(improvement, 1),
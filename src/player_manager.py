@@ -4,14 +4,22 @@ Handles player tracking, synchronization between scraper and database.
 """
 
 import logging
+import re
 from typing import Optional, List, Dict
 from datetime import datetime
 
-from .database import get_db, Database
+from .database import get_db, Database, PLAYER_SUMMARY_FIELDS
 from .scraper import FutbinScraper, PlayerPrice, scrape_player
 
 logger = logging.getLogger(__name__)
 
+# Slug generation: quotes are dropped, other non-alphanumeric runs become dashes
+_SLUG_QUOTE_RE = re.compile(r"['\"]")
+_SLUG_NONALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+# Futbin player URL: /player/<futbin_id>/<slug>
+_PLAYER_URL_RE = re.compile(r'/player/(\d+)/([^/]+)')
+
 
 class PlayerManager:
     """Manages player tracking and price synchronization."""
@@ -108,17 +116,21 @@ class PlayerManager:
             logger.warning(f"No historical prices found for player {player_id}")
             return 0
         
-        # Bulk insert historical prices
-        count = 0
-        for hp in historical_prices:
-            self.db.add_price(
-                player_id=player_id,
-                price=hp.price,
-                platform=self.platform,
-                recorded_at=hp.timestamp
-            )
-            count += 1
+        # Bulk insert historical prices (acknowledged; returns the stored count)
+        count = self.db.add_prices_bulk([
+            {
+                'player_id': player_id,
+                'price': hp.price,
+                'platform': self.platform,
+                'recorded_at': hp.timestamp,
+            }
+            for hp in historical_prices
+        ])
         
+        if count < len(historical_prices):
+            logger.warning(
+                f"Stored {count} of {len(historical_prices)} historical prices for player {player_id}"
+            )
         logger.info(f"Backfilled {count} historical prices for player {player_id}")
         return count
     
@@ -138,9 +150,7 @@ class PlayerManager:
             card_type: Optional card type (ICON, HERO, TOTY, TOTW, PROMO, GOLD_RARE, etc.)
                        If provided, stored on the player document immediately.
         """
-        import re
-
-        match = re.search(r'/player/(\d+)/([^/]+)', url)
+        match = _PLAYER_URL_RE.search(url)
         if not match:
             logger.error(f"Could not parse Futbin URL: {url}")
             return None
@@ -206,29 +216,44 @@ class PlayerManager:
             logger.error(f"Player {player_id} not found")
             return None
         
-        price_data = self.scraper.get_player_prices(
-            player['futbin_id'], 
-            player['slug']
-        )
+        record = self.scrape_price(player)
+        if not record:
+            return None
+        
+        self.db.add_price(**record)
+        
+        logger.info(f"Fetched price for {player['name']}: {record['price']:,}")
+        return record['price']
+    
+    def scrape_price(self, player: Dict) -> Optional[Dict]:
+        """
+        Scrape a player's current price without storing it.
+        
+        player needs 'id', 'futbin_id', 'slug' and 'name'. Returns a price
+        record for add_price / add_prices_bulk, or None (logged) if no price
+        could be fetched.
+        """
+        try:
+            price_data = self.scraper.get_player_prices(player['futbin_id'], player['slug'])
+        except Exception as e:
+            logger.error(f"Failed to fetch price for {player['name']}: {e}")
+            return None
         
         if not price_data or not price_data.current_price:
             logger.warning(f"Could not fetch price for {player['name']}")
             return None
         
-        self.db.add_price(
-            player_id=player_id,
-            price=price_data.current_price,
-            platform=self.platform,
-            price_min=price_data.price_min,
-            price_max=price_data.price_max
-        )
-        
-        logger.info(f"Fetched price for {player['name']}: {price_data.current_price:,}")
-        return price_data.current_price
+        return {
+            'player_id': player['id'],
+            'price': price_data.current_price,
+            'platform': self.platform,
+            'price_min': price_data.price_min,
+            'price_max': price_data.price_max,
+        }
     
     def fetch_all_prices(self) -> Dict[str, int]:
         """Fetch and store prices for all active players."""
-        players = self.db.get_active_players()
+        players = self.db.get_active_players(PLAYER_SUMMARY_FIELDS)
         
         if not players:
             logger.warning("No active players to fetch prices for")
@@ -310,12 +335,7 @@ class PlayerManager:
     
     def _generate_slug(self, name: str) -> str:
         """Generate a URL-friendly slug from a player name."""
-        import re
-        slug = name.lower()
-        slug = re.sub(r"['\"]", '', slug)  # Remove quotes
-        slug = re.sub(r'[^a-z0-9]+', '-', slug)  # Replace non-alphanumeric with dashes
-        slug = slug.strip('-')
-        return slug
+        return _SLUG_NONALNUM_RE.sub('-', _SLUG_QUOTE_RE.sub('', name.lower())).strip('-')
     
     def import_players_bulk(self, players: List[Dict], fetch_prices: bool = False) -> Dict:
         """
@@ -328,29 +348,38 @@ class PlayerManager:
         Returns:
             Stats dict with 'added' and 'failed' counts
         """
-        added = 0
-        failed = 0
+        docs = [
+            {**p, 'slug': p.get('slug') or self._generate_slug(p['name'])}
+            for p in players if p.get('futbin_id') is not None and p.get('name')
+        ]
+        added = self.db.upsert_players_bulk(docs)
         
-        for player in players:
-            try:
-                result = self.add_player(
-                    futbin_id=player['futbin_id'],
-                    name=player['name'],
-                    slug=player.get('slug'),
-                    rating=player.get('rating'),
-                    position=player.get('position'),
-                    version=player.get('version'),
-                    fetch_initial_price=fetch_prices
-                )
-                if result:
-                    added += 1
-                else:
-                    failed += 1
-            except Exception as e:
-                logger.error(f"Failed to import player {player}: {e}")
-                failed += 1
+        if fetch_prices and docs:
+            # Imported players are active, so map futbin_id -> player_id the
+            # same way fetch_all_prices does
+            futbin_to_player = {
+                p['futbin_id']: p['id']
+                for p in self.db.get_active_players(PLAYER_SUMMARY_FIELDS)
+            }
+            player_list = [{'futbin_id': d['futbin_id'], 'slug': d['slug']} for d in docs]
+            
+            prices_to_insert = []
+            for pd in self.scraper.scrape_players(player_list):
+                player_id = futbin_to_player.get(pd.futbin_id)
+                if player_id and pd.current_price:
+                    prices_to_insert.append({
+                        'player_id': player_id,
+                        'price': pd.current_price,
+                        'platform': self.platform,
+                        'price_min': pd.price_min,
+                        'price_max': pd.price_max,
+                    })
+            
+            if prices_to_insert:
+                inserted = self.db.add_prices_bulk(prices_to_insert)
+                logger.info(f"Inserted {inserted} initial price records")
         
-        return {'added': added, 'failed': failed}
+        return {'added': added, 'failed': len(players) - added}
 
 
 # Default starter players - high-value icons/special cards
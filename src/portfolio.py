@@ -9,10 +9,35 @@ from typing import List, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
 from .database import get_db, Database
 
 logger = logging.getLogger(__name__)
 
+# EA takes 5% of every sale
+EA_TAX_RATE = 0.05
+
+
+def _position_pnl(positions: List[Dict], price_key: str) -> Dict[str, np.ndarray]:
+    """
+    P&L arrays for positions valued at pos[price_key], computed for all
+    positions at once.
+    
+    The after-tax sale price is truncated to whole coins, as EA pays out.
+    """
+    buy = np.array([p['buy_price'] for p in positions])
+    qty = np.array([p['quantity'] for p in positions])
+    price = np.array([p[price_key] for p in positions])
+    
+    sell_after_tax = (price * (1 - EA_TAX_RATE)).astype(np.int64)
+    return {
+        'profit_loss': (price - buy) * qty,
+        'profit_pct': ((price - buy) / buy) * 100,
+        'profit_after_tax': (sell_after_tax - buy) * qty,
+        'profit_pct_after_tax': ((sell_after_tax - buy) / buy) * 100,
+    }
+
 
 class PositionType(Enum):
     """Investment tier types."""
@@ -120,25 +145,26 @@ class Portfolio:
         """Get all open positions with current P&L."""
         positions = list(self.db.db.portfolio.find({'status': 'open'}))
         
+        # Current prices for every held player in one query
+        latest_prices = self.db.get_latest_prices_bulk(
+            list({pos['player_id'] for pos in positions}), platform=self.platform
+        )
+        
         for pos in positions:
             pos['id'] = str(pos.pop('_id'))
-            
-            # Get current price
-            latest = self.db.get_latest_price(pos['player_id'], platform=self.platform)
-            if latest:
-                pos['current_price'] = latest['price']
-                pos['profit_loss'] = (latest['price'] - pos['buy_price']) * pos['quantity']
-                pos['profit_pct'] = ((latest['price'] - pos['buy_price']) / pos['buy_price']) * 100
-                
-                # Factor in EA tax (5%)
-                sell_after_tax = int(latest['price'] * 0.95)
-                pos['profit_after_tax'] = (sell_after_tax - pos['buy_price']) * pos['quantity']
-                pos['profit_pct_after_tax'] = ((sell_after_tax - pos['buy_price']) / pos['buy_price']) * 100
-            else:
-                pos['current_price'] = None
+            latest = latest_prices.get(str(pos['player_id']))
+            pos['current_price'] = latest['price'] if latest else None
+            if not latest:
                 pos['profit_loss'] = None
                 pos['profit_pct'] = None
         
+        priced = [pos for pos in positions if pos['current_price'] is not None]
+        if priced:
+            pnl = _position_pnl(priced, 'current_price')
+            for field, values in pnl.items():
+                for pos, value in zip(priced, values.tolist()):
+                    pos[field] = value
+        
         return positions
     
     def get_closed_positions(self, days: int = 30) -> List[Dict]:
@@ -151,45 +177,44 @@ class Portfolio:
         
         for pos in positions:
             pos['id'] = str(pos.pop('_id'))
-            pos['profit_loss'] = (pos['sell_price'] - pos['buy_price']) * pos['quantity']
-            pos['profit_pct'] = ((pos['sell_price'] - pos['buy_price']) / pos['buy_price']) * 100
-            
-            # After tax
-            sell_after_tax = int(pos['sell_price'] * 0.95)
-            pos['profit_after_tax'] = (sell_after_tax - pos['buy_price']) * pos['quantity']
+        
+        if positions:
+            pnl = _position_pnl(positions, 'sell_price')
+            for field in ('profit_loss', 'profit_pct', 'profit_after_tax'):
+                for pos, value in zip(positions, pnl[field].tolist()):
+                    pos[field] = value
         
         return positions
     
     def get_portfolio_summary(self) -> Dict:
-        """Get overall portfolio statistics."""
-        open_positions = self.get_open_positions()
-        closed_positions = self.get_closed_positions(days=30)
+        """
+        Get overall portfolio statistics.
         
-        # Open positions stats
-        total_invested = sum(p['buy_price'] * p['quantity'] for p in open_positions)
-        current_value = sum(
-            p['current_price'] * p['quantity'] 
-            for p in open_positions 
-            if p.get('current_price')
-        )
-        unrealized_pl = sum(
-            p['profit_after_tax'] 
-            for p in open_positions 
-            if p.get('profit_after_tax')
+        Sums and counts are computed server-side in one aggregation, without
+        loading the positions.
+        """
+        totals = self.db.get_portfolio_totals(
+            self.platform, datetime.now() - timedelta(days=30), EA_TAX_RATE
         )
+        open_totals, closed_totals = totals.get('open', {}), totals.get('closed', {})
+        
+        # Open positions stats
+        total_invested = int(open_totals.get('invested', 0))
+        current_value = int(open_totals.get('current_value', 0))
+        unrealized_pl = int(open_totals.get('unrealized_pl', 0))
         
         # Closed positions stats
-        realized_pl = sum(p['profit_after_tax'] for p in closed_positions)
-        wins = len([p for p in closed_positions if p['profit_after_tax'] > 0])
-        losses = len([p for p in closed_positions if p['profit_after_tax'] < 0])
+        realized_pl = int(closed_totals.get('realized_pl', 0))
+        wins = closed_totals.get('wins', 0)
+        losses = closed_totals.get('losses', 0)
         
         return {
-            'open_positions': len(open_positions),
+            'open_positions': open_totals.get('count', 0),
             'total_invested': total_invested,
             'current_value': current_value,
             'unrealized_pl': unrealized_pl,
             'unrealized_pct': (unrealized_pl / total_invested * 100) if total_invested else 0,
-            'closed_30d': len(closed_positions),
+            'closed_30d': closed_totals.get('count', 0),
             'realized_pl_30d': realized_pl,
             'win_rate': (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0,
             'wins': wins,
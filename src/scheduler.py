@@ -74,7 +74,10 @@ class HazardPayScheduler:
         logger.info(f"Starting scheduled analysis at {datetime.now()}")
         
         try:
-            signals = self.analyzer.run_full_analysis()
+            # Only run the detectors relevant to the current market phase.
+            # Over the weekend WL ('hold') that means no per-player detectors:
+            # scheduled runs then raise only watchlist and market-wide alerts.
+            signals = self.analyzer.run_full_analysis(phase_gated=True)
             
             if signals:
                 saved = self.analyzer.save_signals_as_alerts(signals)
@@ -5,6 +5,7 @@ Fetches player prices and market data from Futbin.
 
 import requests
 from bs4 import BeautifulSoup
+import threading
 import time
 import re
 import logging
@@ -72,13 +73,15 @@ class FutbinScraper:
             'User-Agent': 'Mozilla/5.0',
         }
         self._last_request_time = 0
+        self._rate_lock = threading.Lock()
     
     def _rate_limit(self):
-        """Enforce rate limiting between requests."""
-        elapsed = time.time() - self._last_request_time
-        if elapsed < self.delay:
-            time.sleep(self.delay - elapsed)
-        self._last_request_time = time.time()
+        """Enforce rate limiting between requests (shared across threads)."""
+        with self._rate_lock:
+            elapsed = time.time() - self._last_request_time
+            if elapsed < self.delay:
+                time.sleep(self.delay - elapsed)
+            self._last_request_time = time.time()
     
     def _make_request(self, url: str) -> Optional[requests.Response]:
         """Make a rate-limited HTTP request."""